@@ -17,24 +17,27 @@ def read_from_buffer(buffer: io.BytesIO, file_type: str) -> pd.DataFrame:
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Read error: {str(e)}")
 
-def convert_to_buffer(df: pd.DataFrame, target_format: str) -> io.BytesIO:
-    buffer = io.BytesIO()
+def write_to_stream(df: pd.DataFrame, target_format: str, stream) -> None:
     try:
         if target_format == "csv":
-            df.to_csv(buffer, index=False)
+            df.to_csv(stream, index=False)
         elif target_format == "json":
-            df.to_json(buffer, orient="records", lines=True)
+            df.to_json(stream, orient="records", lines=True)
         elif target_format == "excel":
-            with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            with pd.ExcelWriter(stream, engine="openpyxl") as writer:
                 df.to_excel(writer, index=False)
         elif target_format == "parquet":
-            df.to_parquet(buffer, index=False, engine="pyarrow")  # or engine="fastparquet"
+            df.to_parquet(stream, index=False, engine="pyarrow")  # or engine="fastparquet"
         else:
             raise ValueError("Unsupported target format!")
-        buffer.seek(0)
-        return buffer
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
 
+def convert_to_buffer(df: pd.DataFrame, target_format: str) -> io.BytesIO:
+    buffer = io.BytesIO()
+    write_to_stream(df, target_format, buffer)
+    buffer.seek(0)
+    return buffer
+
 def get_extension(file_type: str) -> str:
     return {"csv": "csv", "json": "json", "excel": "xlsx", "parquet": "parquet"}.get(file_type)
@@ -2,7 +2,9 @@ import os
 import io
 import json
 import logging
+import uuid
 import tempfile
+from contextlib import contextmanager, suppress
 from typing import Optional
 
 import pandas as pd
@@ -13,11 +15,13 @@ from google.cloud import storage
 from google.cloud import logging as cloud_logging
 
 # ✅ Module Imports
-from conversion import read_from_buffer, convert_to_buffer, get_extension
+from conversion import read_from_buffer, convert_to_buffer, write_to_stream, get_extension
 from profiling_utils import load_data, profile_dataframe, detect_drift, upload_json_to_gcs
 from normalization import normalize_file
-from validation import validate
-from predict import predict_from_parquet, download_blob
+from validation import validate_path, get_rule_set, cost_summary, VALIDATION_MODES
+from reconciliation import reconcile_files, SAMPLE_SIZE
+from predict import predict_from_parquet, train_model, score_parquet, download_blob
+from registry import valid_model_id
 
 # ✅ App Initialization
 app = FastAPI()
@@ -26,8 +30,11 @@ cloud_logging.Client().setup_logging()
 # ✅ Config
 BUCKET_NAME = "datumsync"
 UPLOAD_PREFIX = "converted/"
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024  # resumable upload chunk, multiple of 256 KiB
 SUPPORTED_EXTENSIONS = [".csv", ".parquet", ".xlsx"]
 SUPPORTED_FORMATS = ('.csv', '.json', '.xlsx', '.parquet')
+STREAMING_FORMATS = ('.csv', '.parquet')
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("VALIDATION_STREAMING_BYTES", 256 * 1024 * 1024))
 
 # ✅ Utility Functions
 def download_from_gcs(bucket_name, blob_name) -> io.BytesIO:
@@ -44,6 +51,34 @@ def upload_to_gcs(bucket_name, blob_name, buffer: io.BytesIO):
     blob = bucket.blob(blob_name)
     blob.upload_from_file(buffer, rewind=True)
 
+@contextmanager
+def staged_blob_writer(bucket, blob_name, **open_kwargs):
+    """Stream into a temporary blob that replaces `blob_name` only when the
+    write completes; on error it is discarded and the old object is kept."""
+    staged = bucket.blob(f"{blob_name}.partial-{uuid.uuid4().hex}")
+    stream = staged.open("wb", **open_kwargs)
+    try:
+        yield stream
+    except BaseException:
+        # Closing would commit the upload, so commit the staged copy and drop it
+        with suppress(Exception):
+            stream.close()
+        with suppress(Exception):
+            staged.delete()
+        raise
+    stream.close()
+    bucket.rename_blob(staged, blob_name)
+
+def stream_to_gcs(bucket_name, blob_name, df, target_format):
+    # Excel output is a zip archive and needs a seekable buffer
+    if target_format == "excel":
+        upload_to_gcs(bucket_name, blob_name, convert_to_buffer(df, target_format))
+        return
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    with staged_blob_writer(bucket, blob_name, chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True) as stream:
+        write_to_stream(df, target_format, stream)
+
 def file_exists_in_gcs(bucket_name: str, blob_name: str) -> bool:
     client = storage.Client()
     bucket = client.bucket(bucket_name)
@@ -64,11 +99,10 @@ def convert_and_upload(
 ):
     source_buffer = download_from_gcs(BUCKET_NAME, filename)
     df = read_from_buffer(source_buffer, source_format)
-    converted_buffer = convert_to_buffer(df, target_format)
 
     base_name = filename.split("/")[-1].rsplit(".", 1)[0]
     converted_filename = f"{UPLOAD_PREFIX}{base_name}_converted.{get_extension(target_format)}"
-    upload_to_gcs(BUCKET_NAME, converted_filename, converted_buffer)
+    stream_to_gcs(BUCKET_NAME, converted_filename, df, target_format)
 
     return {"message": "✅ Conversion successful", "converted_file_path": f"gs://{BUCKET_NAME}/{converted_filename}"}
 
@@ -118,8 +152,18 @@ async def normalize_handler(request: Request):
     if not file_exists_in_gcs(bucket, name):
         return JSONResponse(content={"error": f"File not found: {gcs_path}"}, status_code=404)
 
-    output_path = normalize_file(gcs_path)
-    return {"message": "✅ Normalization complete", "output_path": output_path}
+    try:
+        output_path, report = normalize_file(
+            gcs_path,
+            workers=data.get("workers"),
+            steps=data.get("steps"),
+            precision=data.get("precision"),
+            quantiles=data.get("quantiles"),
+            quantile_k=data.get("quantile_k"),
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return {"message": "✅ Normalization complete", "output_path": output_path, "report": report}
 
 # ✅ Validation
 @app.post("/validate")
@@ -140,23 +184,85 @@ async def validate_file(request: Request):
     blob = bucket.blob(file_name)
     blob.download_to_filename(tmp_path)
 
-    if file_name.endswith(".csv"):
-        df = pd.read_csv(tmp_path)
-    elif file_name.endswith(".json"):
-        df = pd.read_json(tmp_path)
-    elif file_name.endswith(".xlsx"):
-        df = pd.read_excel(tmp_path)
-    elif file_name.endswith(".parquet"):
-        df = pd.read_parquet(tmp_path)
-
-    with open("validation_rules.json") as f:
-        rules = json.load(f)
-
-    result = validate(df, rules)
+    try:
+        rules = get_rule_set(data.get("rule_set"), data.get("rule_set_version"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown rule set: {data.get('rule_set') or 'default'}")
+
+    # Reference tables for foreignKeyMatch: name -> gs:// URI
+    ref_tables = data.get("ref_tables") or {}
+
+    # full, fail_fast (stop at the first failing blocking rule) or sampled
+    mode = data.get("mode", "full")
+    if mode not in VALIDATION_MODES:
+        raise HTTPException(status_code=400, detail="Unknown mode; expected one of full, fail_fast, sampled")
+
+    streaming = data.get("streaming")
+    if streaming is None:
+        streaming = file_name.endswith(STREAMING_FORMATS) and os.path.getsize(tmp_path) > STREAMING_THRESHOLD_BYTES
+    if streaming and not file_name.endswith(STREAMING_FORMATS):
+        raise HTTPException(status_code=400, detail="Streaming validation supports CSV and Parquet files only")
+
+    result = validate_path(
+        tmp_path,
+        rules,
+        ref_tables,
+        streaming=streaming,
+        mode=mode,
+        sample_size=data.get("sample_size"),
+    )
     result_blob = bucket.blob(f"validation-results/{file_name}.results.json")
     result_blob.upload_from_string(json.dumps(result, indent=2))
 
-    return JSONResponse(content={"status": "success", "file": file_name})
+    summary = cost_summary(result)
+    logging.info(f"📊 Validated {file_name} in {summary['wall_time_s']}s", extra={"json_fields": {
+        "metric": "validation_cost", "file": file_name, "rule_set": data.get("rule_set") or "default",
+        "rule_set_version": rules.version, "mode": mode, **summary,
+    }})
+
+    return JSONResponse(content={"status": "success", "file": file_name, "cost_summary": summary})
+
+# ✅ Reconciliation
+@app.post("/reconcile")
+async def reconcile(request: Request):
+    data = await request.json()
+    bucket_name = data.get("bucket")
+    source_name = data.get("source")
+    target_name = data.get("target")
+
+    if not bucket_name or not source_name or not target_name:
+        raise HTTPException(status_code=400, detail="Missing 'bucket', 'source' or 'target'")
+
+    if not source_name.endswith(SUPPORTED_FORMATS) or not target_name.endswith(SUPPORTED_FORMATS):
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_path = os.path.join(tmpdir, "source-" + os.path.basename(source_name))
+        target_path = os.path.join(tmpdir, "target-" + os.path.basename(target_name))
+        bucket.blob(source_name).download_to_filename(source_path)
+        bucket.blob(target_name).download_to_filename(target_path)
+
+        try:
+            result = reconcile_files(
+                source_path,
+                target_path,
+                key_columns=data.get("key_columns"),
+                sample_size=data.get("sample_size", SAMPLE_SIZE),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    result_path = f"reconciliation-results/{source_name}.reconciliation.json"
+    bucket.blob(result_path).upload_from_string(json.dumps(result, indent=2))
+
+    summary = {k: v for k, v in result.items() if k.endswith("_rows") or k.startswith("duplicate_keys")}
+    return JSONResponse(content={"status": "success", "source": source_name, "target": target_name,
+                                 "result_path": result_path, "summary": summary})
 
 # ✅ Prediction: Columns
 @app.post("/columns")
@@ -191,7 +297,69 @@ async def predict(request: Request):
     if not file_exists_in_gcs(bucket_name, scaled_blob_path):
         return JSONResponse(status_code=404, content={"error": "File not found in GCS"})
 
-    result = predict_from_parquet(bucket_name, scaled_blob_path, target_column)
+    try:
+        result = predict_from_parquet(
+            bucket_name, scaled_blob_path, target_column, params=data.get("params"),
+            backend=data.get("backend", "auto"), time_budget=data.get("time_budget_s"),
+            sample_rows=data.get("sample_rows"), cv_folds=data.get("cv_folds"),
+            full_prediction=data.get("full_prediction", True), output=data.get("output", "full"),
+            key_columns=data.get("key_columns"), json_output=data.get("json_output", True),
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return JSONResponse(content=result)
+
+# ✅ Prediction: Train
+@app.post("/train")
+async def train(request: Request):
+    data = await request.json()
+    bucket_name = data.get("bucket_name")
+    scaled_blob_path = data.get("scaled_blob_path")
+    target_column = data.get("target_column")
+
+    if not bucket_name or not scaled_blob_path or not target_column:
+        return JSONResponse(status_code=400, content={"error": "Missing required fields"})
+
+    if not file_exists_in_gcs(bucket_name, scaled_blob_path):
+        return JSONResponse(status_code=404, content={"error": "File not found in GCS"})
+
+    try:
+        result = train_model(
+            bucket_name, scaled_blob_path, target_column, params=data.get("params"),
+            backend=data.get("backend", "auto"), time_budget=data.get("time_budget_s"),
+            sample_rows=data.get("sample_rows"), cv_folds=data.get("cv_folds"),
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return JSONResponse(content=result)
+
+# ✅ Prediction: Score with a stored model
+@app.post("/score")
+async def score(request: Request):
+    data = await request.json()
+    bucket_name = data.get("bucket_name")
+    model_id = data.get("model_id")
+    blob_path = data.get("blob_path")
+
+    if not bucket_name or not model_id or not blob_path:
+        return JSONResponse(status_code=400, content={"error": "Missing required fields"})
+
+    if not valid_model_id(model_id):
+        return JSONResponse(status_code=400, content={"error": "Invalid 'model_id'"})
+
+    if not file_exists_in_gcs(bucket_name, blob_path):
+        return JSONResponse(status_code=404, content={"error": "File not found in GCS"})
+
+    try:
+        result = score_parquet(
+            bucket_name, model_id, blob_path, output_blob=data.get("output_blob"),
+            output=data.get("output", "full"), key_columns=data.get("key_columns"),
+            json_output=data.get("json_output", False),
+        )
+    except LookupError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     return JSONResponse(content=result)
 
 # ✅ Run Locally
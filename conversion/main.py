@@ -1,12 +1,16 @@
 from fastapi import FastAPI, Query, HTTPException
 from google.cloud import storage
 import io
-from conversion import read_from_buffer, convert_to_buffer, get_extension
+import uuid
+from contextlib import contextmanager, suppress
+from conversion import read_from_buffer, convert_to_buffer, write_to_stream, get_extension
 
 app = FastAPI()
 
 BUCKET_NAME = "datumsync"
 UPLOAD_PREFIX = "converted/"
+# Chunk size for resumable GCS uploads (a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
 
 def download_from_gcs(bucket_name, blob_name) -> io.BytesIO:
     client = storage.Client()
@@ -25,6 +29,35 @@ def upload_to_gcs(bucket_name, blob_name, buffer: io.BytesIO):
     blob = bucket.blob(blob_name)
     blob.upload_from_file(buffer, rewind=True)
 
+@contextmanager
+def staged_blob_writer(bucket, blob_name, **open_kwargs):
+    """Stream into a temporary blob that replaces `blob_name` only when the
+    write completes; on error it is discarded and the old object is kept."""
+    staged = bucket.blob(f"{blob_name}.partial-{uuid.uuid4().hex}")
+    stream = staged.open("wb", **open_kwargs)
+    try:
+        yield stream
+    except BaseException:
+        # Closing would commit the upload, so commit the staged copy and drop it
+        with suppress(Exception):
+            stream.close()
+        with suppress(Exception):
+            staged.delete()
+        raise
+    stream.close()
+    bucket.rename_blob(staged, blob_name)
+
+def stream_to_gcs(bucket_name, blob_name, df, target_format):
+    # Excel output is a zip archive and needs a seekable buffer
+    if target_format == "excel":
+        upload_to_gcs(bucket_name, blob_name, convert_to_buffer(df, target_format))
+        return
+
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    with staged_blob_writer(bucket, blob_name, chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True) as stream:
+        write_to_stream(df, target_format, stream)
+
 @app.post("/convert-and-upload")
 def convert_and_upload(
     filename: str = Query(..., description="Filename in the GCS bucket"),
@@ -34,14 +67,13 @@ def convert_and_upload(
     # Step 1: Download source file
     source_buffer = download_from_gcs(BUCKET_NAME, filename)
 
-    # Step 2: Convert
+    # Step 2: Parse source
     df = read_from_buffer(source_buffer, source_format)
-    converted_buffer = convert_to_buffer(df, target_format)
 
-    # Step 3: Upload result
+    # Step 3: Convert straight into a resumable upload
     base_name = filename.split("/")[-1].rsplit(".", 1)[0]
     converted_filename = f"{UPLOAD_PREFIX}{base_name}_converted.{get_extension(target_format)}"
-    upload_to_gcs(BUCKET_NAME, converted_filename, converted_buffer)
+    stream_to_gcs(BUCKET_NAME, converted_filename, df, target_format)
 
     return {
         "message": "✅ Conversion successful",
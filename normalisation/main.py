@@ -50,10 +50,21 @@ async def handle_event(request: Request):
             return JSONResponse(content={"error": f"File not found: {gcs_path}"}, status_code=404)
 
         logging.info(f"✅ Triggered by: {gcs_path}")
-        output_path = normalize_file(gcs_path)
+        output_path, report = normalize_file(
+            gcs_path,
+            workers=data.get("workers"),
+            steps=data.get("steps"),
+            precision=data.get("precision"),
+            quantiles=data.get("quantiles"),
+            quantile_k=data.get("quantile_k"),
+        )
         logging.info(f"📄 Successfully processed and saved to: {output_path}")
 
-        return {"message": "Event processed successfully", "output_path": output_path}
+        return {"message": "Event processed successfully", "output_path": output_path, "report": report}
+
+    except ValueError as e:
+        logging.warning(f"⚠️ Rejected request: {str(e)}")
+        return JSONResponse(content={"error": str(e)}, status_code=400)
 
     except Exception as e:
         logging.exception(f"🚨 Error processing event: {str(e)}")
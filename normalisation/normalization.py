@@ -1,35 +1,302 @@
 import io
+import os
+import atexit
+import uuid
 import numpy as np
 import pandas as pd
 from google.cloud import storage
 from scipy.stats import normaltest
 from scipy.stats.mstats import winsorize
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler, OneHotEncoder
 import pyarrow.parquet as pq
 import pyarrow as pa
 import logging
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, suppress
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
 
-# Load data from GCS
+# Load data from GCS, with the generation of the object that was read
 def load_file_from_gcs(gcs_path):
     client = storage.Client()
     bucket_name, blob_name = gcs_path.replace("gs://", "").split("/", 1)
     bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
+    blob = bucket.get_blob(blob_name)
 
-    if not blob.exists():
+    if blob is None:
         raise FileNotFoundError(f"File not found: {gcs_path}")
 
+    # The download is pinned to the generation get_blob returned
     file_bytes = blob.download_as_bytes()
     ext = gcs_path.split(".")[-1].lower()
 
     if ext == "csv":
-        return pd.read_csv(io.BytesIO(file_bytes))
+        df = pd.read_csv(io.BytesIO(file_bytes))
     elif ext in ["xlsx", "xls"]:
-        return pd.read_excel(io.BytesIO(file_bytes))
+        df = pd.read_excel(io.BytesIO(file_bytes))
     elif ext == "parquet":
-        return pd.read_parquet(io.BytesIO(file_bytes))
+        df = pd.read_parquet(io.BytesIO(file_bytes))
     else:
         raise ValueError("Unsupported file type")
+    return df, blob.generation
+
+# Candidate formats for datetime inference, tried in order
+DATETIME_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    # Catch-all; only values with a date separator count as matches, so
+    # bare years and 8-digit codes stay numeric
+    "ISO8601",
+]
+_DATE_SEPARATOR = r"\d[-/T]\d"
+DATETIME_SAMPLE_SIZE = 1000
+DATETIME_CACHE_SIZE = 10000
+
+# (dataset, column) -> winning format, or None for non-datetime columns
+_datetime_format_cache = {}
+
+def _cache_datetime_format(key, fmt):
+    _datetime_format_cache.pop(key, None)
+    if len(_datetime_format_cache) >= DATETIME_CACHE_SIZE:
+        _datetime_format_cache.pop(next(iter(_datetime_format_cache)))
+    _datetime_format_cache[key] = fmt
+
+def infer_datetime_format(series, sample_size=DATETIME_SAMPLE_SIZE):
+    values = series.dropna()
+    if values.empty:
+        return None
+    if len(values) > sample_size:
+        values = values.sample(n=sample_size, random_state=42)
+    values = values.astype(str)
+
+    best_fmt, best_hits = None, 0
+    for fmt in DATETIME_FORMATS:
+        parsed = pd.to_datetime(values, errors="coerce", format=fmt).notna()
+        if fmt == "ISO8601":
+            parsed &= values.str.contains(_DATE_SEPARATOR)
+        hits = parsed.sum()
+        if hits > best_hits:
+            best_fmt, best_hits = fmt, hits
+        if hits == len(values):
+            break
+    return best_fmt if best_hits > 0.5 * len(values) else None
+
+# Convert object columns to datetime using a per-column format found on a sample
+def convert_datetimes(df, dataset_key=None, sample_size=DATETIME_SAMPLE_SIZE):
+    for col in df.columns:
+        if df[col].dtype != "object":
+            continue
+
+        key = (dataset_key, col)
+        if dataset_key is not None and key in _datetime_format_cache:
+            fmt = _datetime_format_cache[key]
+        else:
+            fmt = infer_datetime_format(df[col], sample_size)
+        if dataset_key is not None:
+            _cache_datetime_format(key, fmt)
+        if fmt is None:
+            continue
+
+        converted = pd.to_datetime(df[col], errors="coerce", format=fmt)
+        if converted.notna().sum() > 0.5 * len(df):
+            df[col] = converted
+            logging.info(f"🕒 Converted {col} to datetime (format={fmt})")
+        elif dataset_key is not None:
+            _cache_datetime_format(key, None)
+    return df
+
+# Worker processes for column-parallel steps; 0 means one per vCPU
+NORMALIZE_WORKERS = int(os.environ.get("NORMALIZE_WORKERS", "1"))
+# Frames smaller than this (rows x columns) are not worth shipping to workers
+PARALLEL_MIN_CELLS = 1_000_000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _resolve_workers(workers):
+    # Requests may ask for fewer workers than the machine has, never more
+    workers = NORMALIZE_WORKERS if workers is None else workers
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers < 0:
+        raise ValueError(f"Invalid workers: {workers!r}; expected a non-negative integer")
+    cpus = os.cpu_count() or 1
+    return min(workers, cpus) if workers > 0 else cpus
+
+def _get_executor():
+    # One pool per process, sized to the machine; each call only submits as
+    # many shards as it has workers. Forkserver children do not inherit the
+    # server's threads or locks, which a plain fork would.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=get_context("forkserver"))
+            atexit.register(_executor.shutdown)
+        return _executor
+
+def _discard_executor(broken):
+    # A worker died (OOM kill, crash): a broken pool rejects every later
+    # submit, so drop it and let the next caller build a fresh one
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+def _write_back(df, col, values, out_dtype=None):
+    dtype = df[col].dtype
+    if out_dtype is not None:
+        values = values.astype(out_dtype, copy=False)
+    elif isinstance(dtype, np.dtype) and np.issubdtype(dtype, np.integer) and not np.isnan(values).any():
+        values = values.astype(dtype)
+    df[col] = values
+
+def _run_shard(shm_name, shape, indices, kernel, params):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        results = [(i, kernel(block[i], **params)) for i in indices]
+        del block
+        return results
+    finally:
+        shm.close()
+
+# Run kernel(values, **params) in place on each column's float64 values.
+# Columns are sharded across a process pool through one shared-memory block;
+# results come back keyed by column, in column order. Integer columns keep
+# their dtype unless the kernel introduced NaNs; out_dtype overrides the
+# dtype written back for every column. If the pool breaks, the call is
+# retried once on a fresh pool and then run serially.
+def map_columns(df, columns, kernel, workers=None, out_dtype=None, **params):
+    columns = list(columns)
+    workers = min(_resolve_workers(workers), len(columns))
+    if workers > 1 and len(df) * len(columns) >= PARALLEL_MIN_CELLS:
+        for _ in range(2):
+            executor = _get_executor()
+            try:
+                return _map_shared(executor, df, columns, kernel, workers, out_dtype, params)
+            except BrokenProcessPool:
+                logging.warning(f"⚠️ Worker pool broke while running {kernel.__name__}; replacing it")
+                _discard_executor(executor)
+        logging.warning(f"⚠️ Running {kernel.__name__} serially")
+
+    results = {}
+    for col in columns:
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        results[col] = kernel(values, **params)
+        _write_back(df, col, values, out_dtype)
+    return results
+
+def _map_shared(executor, df, columns, kernel, workers, out_dtype, params):
+    # df is only written once every shard has finished, so a failed attempt
+    # leaves it untouched
+    shape = (len(columns), len(df))
+    shm = shared_memory.SharedMemory(create=True, size=8 * shape[0] * shape[1])
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, col in enumerate(columns):
+            block[i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        futures = [
+            executor.submit(_run_shard, shm.name, shape, shard.tolist(), kernel, params)
+            for shard in np.array_split(np.arange(len(columns)), workers)
+        ]
+        results = {}
+        for future in futures:
+            for i, result in future.result():
+                results[columns[i]] = result
+
+        for i, col in enumerate(columns):
+            _write_back(df, col, block[i].copy(), out_dtype)
+        del block
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
+
+# Approximate quantiles: a KLL sketch (Karnin, Lang & Liberty, 2016).
+# Rank error is roughly 1.7 / k; coin flips come from a seeded generator so a
+# given (k, seed) and input order always give the same answer.
+class QuantileSketch:
+    def __init__(self, k=200, seed=42):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0)]
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.count += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum_weights = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs, dtype=np.float64) * cum_weights[-1]
+        return items[np.minimum(np.searchsorted(cum_weights, ranks), len(items) - 1)]
+
+    def _capacity(self, h):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h))))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # An odd item out stays behind; the rest pair up and one of
+                # each pair is promoted with double weight
+                keep = level[len(level) - len(level) % 2:]
+                promoted = level[self.rng.integers(2):len(level) - len(keep):2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+# Values fed to a sketch per update, so no full-column sort is ever needed
+SKETCH_BLOCK_ROWS = 65_536
+
+# Quantile backend for imputation and IQR bounds: "exact" or "approx"
+NORMALIZE_QUANTILES = os.environ.get("NORMALIZE_QUANTILES", "exact")
+
+def _quantiles(values, qs, sketch=None):
+    if sketch is None:
+        return np.nanquantile(values, qs)
+    qsketch = QuantileSketch(**sketch)
+    for start in range(0, len(values), SKETCH_BLOCK_ROWS):
+        qsketch.update(values[start:start + SKETCH_BLOCK_ROWS])
+    return qsketch.quantiles(qs)
+
+def _sketch_options(quantiles, k=None, seed=None):
+    if quantiles in (None, "exact"):
+        return None
+    if quantiles != "approx":
+        raise ValueError(f"Unsupported quantile method: {quantiles}")
+    return {"k": k or 200, "seed": 42 if seed is None else seed}
 
 # Detect outliers
 def detect_outliers(df, method=None, threshold=1.5):
@@ -37,113 +304,287 @@ def detect_outliers(df, method=None, threshold=1.5):
     numeric_cols = df.select_dtypes(include=[np.number]).columns
 
     if method is None:
-        sample = df.sample(frac=0.1, random_state=42)
-        normality_pvals = sample[numeric_cols].apply(lambda x: normaltest(x.dropna())[1] if x.dropna().shape[0] > 8 else np.nan)
-        normality_pvals = normality_pvals.dropna()
-
-        if not normality_pvals.empty and (normality_pvals > 0.05).all():
-            method = "zscore"
-        else:
-            method = "iqr"
-        logging.info(f"Auto-selected outlier method: {method}")
+        method = select_outlier_method(df, numeric_cols)
 
     for col in numeric_cols:
-        if method == "iqr":
-            Q1, Q3 = df[col].quantile([0.25, 0.75])
-            IQR = Q3 - Q1
-            lower, upper = Q1 - threshold * IQR, Q3 + threshold * IQR
-            mask = (df[col] < lower) | (df[col] > upper)
-        elif method == "zscore":
-            mean, std = df[col].mean(), df[col].std()
-            mask = abs((df[col] - mean) / std) > threshold
-        else:
-            raise ValueError("Invalid method")
-
+        mask = _outlier_mask(df[col].to_numpy(dtype=np.float64, na_value=np.nan), method, threshold)
         outlier_percentages[col] = (mask.sum() / len(df)) * 100
     return outlier_percentages
 
+def select_outlier_method(df, numeric_cols):
+    sample = df.sample(frac=0.1, random_state=42)
+    normality_pvals = sample[numeric_cols].apply(lambda x: normaltest(x.dropna())[1] if x.dropna().shape[0] > 8 else np.nan)
+    normality_pvals = normality_pvals.dropna()
+
+    if not normality_pvals.empty and (normality_pvals > 0.05).all():
+        method = "zscore"
+    else:
+        method = "iqr"
+    logging.info(f"Auto-selected outlier method: {method}")
+    return method
+
+def _outlier_mask(values, method, threshold, quartiles=None):
+    if method == "iqr":
+        Q1, Q3 = np.nanquantile(values, [0.25, 0.75]) if quartiles is None else quartiles
+        IQR = Q3 - Q1
+        lower, upper = Q1 - threshold * IQR, Q3 + threshold * IQR
+        return (values < lower) | (values > upper)
+    elif method == "zscore":
+        mean, std = np.nanmean(values), np.nanstd(values, ddof=1)
+        return np.abs((values - mean) / std) > threshold
+    raise ValueError("Invalid method")
+
 # Handle outliers
 def clean_or_winsorize(df, outlier_percentages, threshold=5):
     for col, pct in outlier_percentages.items():
         if not np.issubdtype(df[col].dtype, np.number):
             continue
-        Q1, Q3 = df[col].quantile([0.25, 0.75])
-        IQR = Q3 - Q1
-        lower, upper = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
-        if pct <= threshold:
-            df[col] = df[col].where((df[col] >= lower) & (df[col] <= upper))
-        else:
-            df[col] = winsorize(df[col], limits=(0.05, 0.05))
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        _clip_outliers(values, pct, threshold)
+        _write_back(df, col, values)
     return df
 
+# tails, if given, are the 5th and 95th percentiles to clip to instead of
+# winsorizing exactly
+def _clip_outliers(values, pct, threshold, quartiles=None, tails=None):
+    Q1, Q3 = np.nanquantile(values, [0.25, 0.75]) if quartiles is None else quartiles
+    IQR = Q3 - Q1
+    lower, upper = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+    if pct <= threshold:
+        values[(values < lower) | (values > upper)] = np.nan
+    elif tails is None:
+        values[:] = np.asarray(winsorize(values, limits=(0.05, 0.05)))
+    else:
+        np.clip(values, *tails, out=values)
+
+# Detect and handle outliers in one pass per column, sharded across workers
+def handle_outliers(df, method=None, threshold=1.5, clip_threshold=5, workers=None, sketch=None):
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if method is None:
+        method = select_outlier_method(df, numeric_cols)
+    return map_columns(
+        df, numeric_cols, _outlier_kernel, workers,
+        method=method, threshold=threshold, clip_threshold=clip_threshold, sketch=sketch,
+    )
+
+def _outlier_kernel(values, method, threshold, clip_threshold, sketch=None):
+    # With a sketch, one pass over the column gives both the quartiles and
+    # the winsorizing tails
+    if sketch is None:
+        quartiles, tails = _quantiles(values, [0.25, 0.75]), None
+    else:
+        q05, q25, q75, q95 = _quantiles(values, [0.05, 0.25, 0.75, 0.95], sketch)
+        quartiles, tails = (q25, q75), (q05, q95)
+    pct = (_outlier_mask(values, method, threshold, quartiles).sum() / len(values)) * 100
+    _clip_outliers(values, pct, clip_threshold, quartiles, tails)
+    return pct
+
+# Fill missing numeric values with the column median
+def impute_median(df, workers=None, sketch=None):
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    missing = numeric_cols[df[numeric_cols].isna().any().to_numpy()]
+    return map_columns(df, missing, _impute_kernel, workers, sketch=sketch)
+
+def _impute_kernel(values, sketch=None):
+    median = _quantiles(values, [0.5], sketch)[0]
+    values[np.isnan(values)] = median
+    return median
+
 # Encode categoricals
-def encode_categorical(df):
+def encode_categorical(df, max_onehot=10):
     cat_cols = df.select_dtypes(include=["object", "category"]).columns
+    if cat_cols.empty:
+        return df
+
+    # Dictionary-encode every column once; the codes drive both encodings
+    labels, onehot = {}, {}
     for col in cat_cols:
-        unique_vals = df[col].nunique()
-        if unique_vals <= 10:
-            enc = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
-            transformed = enc.fit_transform(df[[col]])
-            col_names = [f"{col}_{i}" for i in range(transformed.shape[1])]
-            df = df.drop(columns=[col]).join(pd.DataFrame(transformed, columns=col_names, index=df.index))
+        codes, uniques = pd.factorize(df[col], sort=True, use_na_sentinel=False)
+        codes = codes.astype(np.int32, copy=False)
+        if len(uniques) - pd.isna(uniques).sum() <= max_onehot:
+            onehot[col] = _one_hot(codes, len(uniques), col, df.index)
         else:
-            df[col] = LabelEncoder().fit_transform(df[col].astype(str))
-    return df
+            labels[col] = codes
+
+    base = pd.DataFrame(
+        {col: labels.get(col, df[col]) for col in df.columns if col not in onehot},
+        index=df.index,
+    )
+    return pd.concat([base, *onehot.values()], axis=1)
+
+def _one_hot(codes, n_values, col, index):
+    col_names = [f"{col}_{i}" for i in range(n_values)]
+    block = np.zeros((len(codes), n_values), dtype=np.uint8)
+    block[np.arange(len(codes)), codes] = 1
+    return pd.DataFrame(block, columns=col_names, index=index)
+
+# Numeric dtypes that are scaled: int32 covers the label codes from
+# encode_categorical; uint8 one-hot indicators are left as they are
+SCALED_DTYPES = ["float64", "int64", "int32"]
 
 # Scale numeric features
-def scale_numerical(df):
-    num_cols = df.select_dtypes(include=["float64", "int64"]).columns
-    if not num_cols.empty:
-        scaler = MinMaxScaler()
-        df[num_cols] = scaler.fit_transform(df[num_cols])
+def scale_numerical(df, workers=None, precision="float64"):
+    num_cols = df.select_dtypes(include=SCALED_DTYPES).columns
+    map_columns(df, num_cols, _scale_kernel, workers, out_dtype=_float_dtype(precision))
     return df
 
+def _scale_kernel(values):
+    # Same arithmetic as sklearn's MinMaxScaler with feature_range=(0, 1)
+    data_min, data_max = np.nanmin(values), np.nanmax(values)
+    data_range = data_max - data_min
+    scale = 1.0 / (data_range if data_range != 0 else 1.0)
+    values *= scale
+    values += -data_min * scale
+
+# Output precision for scaled features: "float64" (default) or "float32".
+# One-hot indicators are always uint8; label codes are scaled like any other
+# numeric column.
+NORMALIZE_PRECISION = os.environ.get("NORMALIZE_PRECISION", "float64")
+
+def _float_dtype(precision):
+    if precision not in ("float64", "float32"):
+        raise ValueError(f"Unsupported precision: {precision}")
+    return np.dtype(precision)
+
+# Chunk size for resumable GCS uploads (a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+# Rows converted to Arrow per Parquet row group
+WRITE_BATCH_ROWS = 250_000
+
+@contextmanager
+def staged_blob_writer(bucket, blob_name, **open_kwargs):
+    """Stream into a temporary blob that replaces `blob_name` only when the
+    write completes; on error it is discarded and the old object is kept."""
+    staged = bucket.blob(f"{blob_name}.partial-{uuid.uuid4().hex}")
+    stream = staged.open("wb", **open_kwargs)
+    try:
+        yield stream
+    except BaseException:
+        # Closing would commit the upload, so commit the staged copy and drop it
+        with suppress(Exception):
+            stream.close()
+        with suppress(Exception):
+            staged.delete()
+        raise
+    stream.close()
+    bucket.rename_blob(staged, blob_name)
+
 # Save DataFrame to Parquet in GCS
 def save_parquet_to_gcs(df, output_path):
     client = storage.Client()
     bucket_name, blob_name = output_path.replace("gs://", "").split("/", 1)
     bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-
-    sink = pa.BufferOutputStream()
-    table = pa.Table.from_pandas(df)
-    with pq.ParquetWriter(sink, schema=table.schema, compression="snappy") as writer:
-        writer.write_table(table)
 
-    blob.upload_from_string(sink.getvalue().to_pybytes(), content_type="application/octet-stream")
+    # Stream row groups straight into a chunked resumable upload, so only one
+    # Arrow batch and one upload chunk are held in memory, never the whole file.
+    # A failed write leaves a truncated file only in the discarded staged blob.
+    schema = pa.Schema.from_pandas(df)
+    with staged_blob_writer(bucket, blob_name, content_type="application/octet-stream",
+                            chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True) as sink:
+        with pq.ParquetWriter(sink, schema=schema, compression="snappy") as writer:
+            for start in range(0, len(df), WRITE_BATCH_ROWS):
+                writer.write_table(pa.Table.from_pandas(df.iloc[start:start + WRITE_BATCH_ROWS], schema=schema))
     logging.info(f"✅ Saved normalized data to: {output_path}")
 
-# Master normalization function
-def normalize_file(gcs_path):
-    logging.info(f"📥 Starting normalization for: {gcs_path}")
-    df = load_file_from_gcs(gcs_path)
+# Normalization steps: step(df, options) -> (df, affected columns)
+def _drop_empty_step(df, options):
+    empty = df.columns[df.isna().all().to_numpy()]
+    return df.drop(columns=empty), list(empty)
 
-    # Drop fully empty columns
-    df.dropna(axis=1, how="all", inplace=True)
+def _datetime_step(df, options):
+    before = df.dtypes
+    df = convert_datetimes(df, dataset_key=options.get("dataset_key"))
+    return df, [col for col in df.columns if df[col].dtype != before[col]]
 
-    # Try converting object to datetime if >50% valid
-    for col in df.columns:
-        if df[col].dtype == "object":
-            converted = pd.to_datetime(df[col], errors="coerce", format="%Y-%m-%d")
-            if converted.notna().sum() > 0.5 * len(df):
-                df[col] = converted
-                logging.info(f"🕒 Converted {col} to datetime")
+def _impute_step(df, options):
+    return df, list(impute_median(df, options.get("workers"), options.get("sketch")))
 
-    # Fill missing values
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
+def _outliers_step(df, options):
+    outliers = handle_outliers(df, workers=options.get("workers"), sketch=options.get("sketch"))
+    return df, [col for col, pct in outliers.items() if pct > 0]
+
+def _encode_step(df, options):
+    cat_cols = df.select_dtypes(include=["object", "category"]).columns
+    return encode_categorical(df), list(cat_cols)
+
+def _scale_step(df, options):
+    num_cols = df.select_dtypes(include=SCALED_DTYPES).columns
+    return scale_numerical(df, options.get("workers"), options.get("precision", "float64")), list(num_cols)
+
+NORMALIZATION_STEPS = {
+    "drop_empty": _drop_empty_step,
+    "datetime": _datetime_step,
+    "impute": _impute_step,
+    "outliers": _outliers_step,
+    "encode": _encode_step,
+    "scale": _scale_step,
+}
+DEFAULT_STEPS = list(NORMALIZATION_STEPS)
+
+# Trace Python/numpy allocations per step (worker processes are not traced).
+# Off by default: tracemalloc slows every allocation while it is running.
+TRACE_MEMORY = os.environ.get("NORMALIZE_TRACE_MEMORY", "0") == "1"
+
+# Run the selected steps in order, recording time and memory for each
+def run_steps(df, steps=None, options=None):
+    steps = DEFAULT_STEPS if steps is None else list(steps)
+    options = options or {}
+    unknown = [name for name in steps if name not in NORMALIZATION_STEPS]
+    if unknown:
+        raise ValueError(f"Unknown normalization steps: {unknown}")
 
-    # Process outliers
-    outliers = detect_outliers(df)
-    df = clean_or_winsorize(df, outliers)
+    tracing = TRACE_MEMORY and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    report = []
+    try:
+        for name in steps:
+            rows_in, cols_in = df.shape
+            if TRACE_MEMORY:
+                tracemalloc.reset_peak()
+                mem_before = tracemalloc.get_traced_memory()[0]
+            wall, cpu = time.perf_counter(), time.process_time()
+
+            df, affected = NORMALIZATION_STEPS[name](df, options)
+
+            entry = {
+                "step": name,
+                "wall_time_s": round(time.perf_counter() - wall, 4),
+                "cpu_time_s": round(time.process_time() - cpu, 4),
+                "peak_memory_delta_mb": None,
+                "rows_in": rows_in,
+                "rows_out": len(df),
+                "columns_in": cols_in,
+                "columns_out": df.shape[1],
+                "columns_affected": len(affected),
+            }
+            if TRACE_MEMORY:
+                entry["peak_memory_delta_mb"] = round((tracemalloc.get_traced_memory()[1] - mem_before) / 2**20, 2)
+            logging.info(f"⏱️ Step {name}: {entry}")
+            report.append(entry)
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    return df, report
+
+# Master normalization function
+def normalize_file(gcs_path, workers=None, steps=None, precision=None, quantiles=None, quantile_k=None):
+    logging.info(f"📥 Starting normalization for: {gcs_path}")
+    workers = _resolve_workers(workers)
+    df, generation = load_file_from_gcs(gcs_path)
 
-    # Encode & scale
-    df = encode_categorical(df)
-    df = scale_numerical(df)
+    options = {
+        "workers": workers,
+        # A re-uploaded file is a new generation, so its formats are re-inferred
+        "dataset_key": f"{gcs_path}#{generation}",
+        "precision": precision or NORMALIZE_PRECISION,
+        "sketch": _sketch_options(quantiles or NORMALIZE_QUANTILES, quantile_k),
+    }
+    df, report = run_steps(df, steps, options)
 
     # Output path
     output_path = gcs_path.replace("raw/", "normalized/").rsplit(".", 1)[0] + "_normalized.parquet"
     save_parquet_to_gcs(df, output_path)
 
     logging.info(f"✅ Finished normalization for: {gcs_path}")
-    return output_path
+    return output_path, report
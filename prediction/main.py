@@ -5,7 +5,8 @@ import tempfile
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from google.cloud import storage
-from predict import predict_from_parquet, download_blob
+from predict import predict_from_parquet, train_model, score_parquet, download_blob
+from registry import valid_model_id
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -67,10 +68,83 @@ async def predict(request: Request):
         if not gcs_blob_exists(bucket_name, scaled_blob_path):
             return JSONResponse(status_code=404, content={"error": "File not found in GCS"})
 
-        result = predict_from_parquet(bucket_name, scaled_blob_path, target_column)
+        result = predict_from_parquet(
+            bucket_name, scaled_blob_path, target_column, params=data.get("params"),
+            backend=data.get("backend", "auto"), time_budget=data.get("time_budget_s"),
+            sample_rows=data.get("sample_rows"), cv_folds=data.get("cv_folds"),
+            full_prediction=data.get("full_prediction", True), output=data.get("output", "full"),
+            key_columns=data.get("key_columns"), json_output=data.get("json_output", True),
+        )
         return JSONResponse(content=result)
 
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logging.exception("❌ Exception in /predict")
         return JSONResponse(status_code=500, content={"error": f"Error in /predict: {str(e)}"})
 
+
+# Endpoint: Train (or reuse) a model and return its id
+@app.post("/train")
+async def train(request: Request):
+    try:
+        data = await request.json()
+        logging.info(f"📥 /train payload: {data}")
+
+        bucket_name = data.get("bucket_name")
+        scaled_blob_path = data.get("scaled_blob_path")
+        target_column = data.get("target_column")
+
+        if not bucket_name or not scaled_blob_path or not target_column:
+            return JSONResponse(status_code=400, content={"error": "Missing 'bucket_name', 'scaled_blob_path' or 'target_column'"})
+
+        if not gcs_blob_exists(bucket_name, scaled_blob_path):
+            return JSONResponse(status_code=404, content={"error": "File not found in GCS"})
+
+        result = train_model(
+            bucket_name, scaled_blob_path, target_column, params=data.get("params"),
+            backend=data.get("backend", "auto"), time_budget=data.get("time_budget_s"),
+            sample_rows=data.get("sample_rows"), cv_folds=data.get("cv_folds"),
+        )
+        return JSONResponse(content=result)
+
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        logging.exception("❌ Exception in /train")
+        return JSONResponse(status_code=500, content={"error": f"Error in /train: {str(e)}"})
+
+# Endpoint: Score a parquet file with a stored model
+@app.post("/score")
+async def score(request: Request):
+    try:
+        data = await request.json()
+        logging.info(f"📥 /score payload: {data}")
+
+        bucket_name = data.get("bucket_name")
+        model_id = data.get("model_id")
+        blob_path = data.get("blob_path")
+
+        if not bucket_name or not model_id or not blob_path:
+            return JSONResponse(status_code=400, content={"error": "Missing 'bucket_name', 'model_id' or 'blob_path'"})
+
+        if not valid_model_id(model_id):
+            return JSONResponse(status_code=400, content={"error": "Invalid 'model_id'"})
+
+        if not gcs_blob_exists(bucket_name, blob_path):
+            return JSONResponse(status_code=404, content={"error": "File not found in GCS"})
+
+        result = score_parquet(
+            bucket_name, model_id, blob_path, output_blob=data.get("output_blob"),
+            output=data.get("output", "full"), key_columns=data.get("key_columns"),
+            json_output=data.get("json_output", False),
+        )
+        return JSONResponse(content=result)
+
+    except LookupError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        logging.exception("❌ Exception in /score")
+        return JSONResponse(status_code=500, content={"error": f"Error in /score: {str(e)}"})
@@ -1,16 +1,82 @@
 import os
+import time
+import logging
+import numpy as np
 import pandas as pd
-import joblib
+import pyarrow as pa
+import pyarrow.parquet as pq
+import uuid
 import tempfile
+import warnings
+from contextlib import ExitStack, contextmanager, suppress
 from google.cloud import storage
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from joblib import effective_n_jobs
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.base import clone
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import StratifiedKFold, cross_validate, train_test_split
 from sklearn.metrics import classification_report
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils.multiclass import type_of_target
 
-def download_blob(bucket_name, source_blob_name, destination_file_name):
+from registry import ModelRegistry, dataset_fingerprint, model_key
+
+# Training backends: estimator and its default settings. Request params
+# override these; backend, params and time budget are part of the registry key.
+TRAINING_BACKENDS = {
+    "random_forest": (RandomForestClassifier, {"n_estimators": 100, "random_state": 42, "n_jobs": -1}),
+    "hist_gradient_boosting": (HistGradientBoostingClassifier, {
+        "max_iter": 200, "early_stopping": True, "validation_fraction": 0.1,
+        "n_iter_no_change": 10, "random_state": 42,
+    }),
+    "linear": (LogisticRegression, {"max_iter": 1000}),
+    "sgd": (SGDClassifier, {"loss": "log_loss", "early_stopping": True, "random_state": 42, "n_jobs": -1}),
+}
+# Backends fitted behind a StandardScaler: their solvers and penalties assume
+# comparably scaled features, which label-encoded or unscaled columns are not
+SCALED_BACKENDS = {"linear", "sgd"}
+# Automatic choice by training rows: forests up to FOREST_MAX_ROWS rows,
+# histogram boosting beyond, linear models for very wide data, SGD for very
+# wide and long data. Training sets hold at most (1 - TEST_SIZE) of the
+# sample, so SGD_MIN_ROWS must stay below that to be reachable.
+FOREST_MAX_ROWS = int(os.environ.get("FOREST_MAX_ROWS", 200_000))
+LINEAR_MIN_FEATURES = int(os.environ.get("LINEAR_MIN_FEATURES", 2_000))
+SGD_MIN_ROWS = int(os.environ.get("SGD_MIN_ROWS", 500_000))
+# Wall-clock seconds for fitting, checked between steps, so the last step may
+# overrun it. Ensembles stop growing once it is spent; logistic regression
+# with a WARM_START_SOLVERS solver stops iterating, and the remaining solvers
+# (liblinear) and SGD run to their own max_iter in a single fit.
+TRAINING_TIME_BUDGET_S = float(os.environ.get("TRAINING_TIME_BUDGET_S", 300))
+# Trees / boosting iterations / solver iterations fitted per step; forest
+# steps are raised to the number of jobs so every core gets a tree
+FIT_STEPS = {"random_forest": 10, "hist_gradient_boosting": 20, "linear": 100}
+# Logistic solvers that resume from the previous coefficients with warm_start
+WARM_START_SOLVERS = {"lbfgs", "newton-cg", "newton-cholesky", "sag", "saga"}
+TEST_SIZE = 0.2
+# Training-set budget: larger files are subsampled, stratified by target class
+TRAINING_SAMPLE_ROWS = int(os.environ.get("TRAINING_SAMPLE_ROWS", 1_000_000))
+# Rows every class keeps in the sample (or all of them, if it has fewer)
+MIN_CLASS_ROWS = int(os.environ.get("MIN_CLASS_ROWS", 50))
+# Targets with more distinct values are rejected as not categorical
+MAX_CLASSES = int(os.environ.get("MAX_CLASSES", 1_000))
+# Cross-validation fold fits run in parallel across this many workers, unless
+# the estimator already uses several cores (then folds run one at a time)
+CV_N_JOBS = int(os.environ.get("CV_N_JOBS", -1))
+CV_SCORING = ["accuracy", "f1_macro"]
+# Rows read per batch when sampling; read, predicted and written when scoring
+SCORE_BATCH_ROWS = int(os.environ.get("SCORE_BATCH_ROWS", 100_000))
+# Scoring output: "full" rewrites the input plus a prediction column;
+# "compact" writes only a row key (or row index), prediction and probabilities
+PREDICTION_OUTPUTS = ("full", "compact")
+# Chunk size for resumable GCS uploads (a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+def download_blob(bucket_name, source_blob_name, destination_file_name, generation=None):
     client = storage.Client()
     bucket = client.bucket(bucket_name)
-    blob = bucket.blob(source_blob_name)
+    blob = bucket.blob(source_blob_name, generation=generation)
     blob.download_to_filename(destination_file_name)
 
 def upload_blob(bucket_name, source_file_name, destination_blob_name):
@@ -19,48 +85,436 @@ def upload_blob(bucket_name, source_file_name, destination_blob_name):
     blob = bucket.blob(destination_blob_name)
     blob.upload_from_filename(source_file_name)
 
-def predict_from_parquet(bucket_name, scaled_blob_path, target_column):
+@contextmanager
+def staged_blob_writer(bucket, blob_name, **open_kwargs):
+    """Stream into a temporary blob that replaces `blob_name` only when the
+    write completes; on error it is discarded and the old object is kept."""
+    staged = bucket.blob(f"{blob_name}.partial-{uuid.uuid4().hex}")
+    stream = staged.open("wb", **open_kwargs)
+    try:
+        yield stream
+    except BaseException:
+        # Closing would commit the upload, so commit the staged copy and drop it
+        with suppress(Exception):
+            stream.close()
+        with suppress(Exception):
+            staged.delete()
+        raise
+    stream.close()
+    bucket.rename_blob(staged, blob_name)
+
+def _fetch(bucket_name, blob_path, fingerprint, tmpdir):
+    # One local copy per request, pinned to the fingerprinted generation
+    local_path = os.path.join(tmpdir, "scaled.parquet")
+    if not os.path.exists(local_path):
+        download_blob(bucket_name, blob_path, local_path, generation=fingerprint["generation"])
+    return local_path
+
+def select_backend(rows, features):
+    if features >= LINEAR_MIN_FEATURES:
+        return "sgd" if rows >= SGD_MIN_ROWS else "linear"
+    if rows > FOREST_MAX_ROWS:
+        return "hist_gradient_boosting"
+    return "random_forest"
+
+def _fit_linear(model, X, y, time_budget):
+    # The solver runs FIT_STEPS["linear"] iterations at a time, resuming from
+    # the previous coefficients, until it converges, reaches max_iter or
+    # spends the budget. The loss is convex, so slicing only changes where a
+    # converged run stops within tol.
+    start = time.perf_counter()
+    requested = model.get_params()["max_iter"]
+    done, exhausted = 0, False
+    model.set_params(warm_start=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        while done < requested:
+            step = min(FIT_STEPS["linear"], requested - done)
+            model.set_params(max_iter=step)
+            model.fit(X, y)
+            done += int(np.max(model.n_iter_))
+            if np.max(model.n_iter_) < step:
+                break  # converged
+            if done < requested and time.perf_counter() - start > time_budget:
+                exhausted = True
+                break
+    model.set_params(warm_start=False, max_iter=requested)
+    return {"fit_seconds": round(time.perf_counter() - start, 3), "budget_exhausted": exhausted, "max_iter": done}
+
+def _fit(backend, model, X, y, time_budget):
+    # Ensembles are grown in steps with warm_start (same result as one fit
+    # for a fixed random_state) and stop early once the budget is spent.
+    # SGD is fitted in one call: refitting with warm_start would restart its
+    # learning-rate schedule, so its epochs are bounded by max_iter and early
+    # stopping rather than by the budget. A pipeline's scaler is fitted once
+    # and the steps below fit its estimator on the scaled features.
+    if isinstance(model, Pipeline):
+        X = model[:-1].fit_transform(X, y)
+        model = model[-1]
+    if backend == "linear" and model.get_params()["solver"] in WARM_START_SOLVERS:
+        return _fit_linear(model, X, y, time_budget)
+    start = time.perf_counter()
+    size_param = {"random_forest": "n_estimators", "hist_gradient_boosting": "max_iter"}.get(backend)
+    if size_param is None:
+        model.fit(X, y)
+        return {"fit_seconds": round(time.perf_counter() - start, 3), "budget_exhausted": False}
+
+    requested = model.get_params()[size_param]
+    step = FIT_STEPS[backend]
+    if backend == "random_forest":
+        step = max(step, effective_n_jobs(model.get_params()["n_jobs"]))
+    size, exhausted = 0, False
+    model.set_params(warm_start=True)
+    while size < requested:
+        size = min(size + step, requested)
+        model.set_params(**{size_param: size})
+        model.fit(X, y)
+        if backend == "hist_gradient_boosting" and model.n_iter_ < size:
+            break  # early stopping converged
+        if size < requested and time.perf_counter() - start > time_budget:
+            exhausted = True
+            break
+    model.set_params(warm_start=False)
+    return {
+        "fit_seconds": round(time.perf_counter() - start, 3),
+        "budget_exhausted": exhausted,
+        size_param: int(getattr(model, "n_iter_", size)),
+    }
+
+class _ClassReservoir:
+    """Lowest-priority `quota` rows of one class. Candidates above the current
+    threshold are dropped on arrival; the rest are compacted in bulk."""
+
+    def __init__(self, quota):
+        self.quota = quota
+        self.threshold = 1.0
+        self.frames, self.keys, self.pending = [], [], 0
+
+    def add(self, frame, keys):
+        if self.quota <= 0:
+            return
+        keep = keys < self.threshold
+        if not keep.any():
+            return
+        self.frames.append(frame[keep])
+        self.keys.append(keys[keep])
+        self.pending += int(keep.sum())
+        if self.pending > 2 * self.quota:
+            self._compact()
+
+    def _compact(self):
+        frame, keys = pd.concat(self.frames), np.concatenate(self.keys)
+        if len(keys) > self.quota:
+            top = np.argpartition(keys, self.quota)[:self.quota]
+            frame, keys = frame.iloc[top], keys[top]
+            self.threshold = float(keys.max())
+        self.frames, self.keys, self.pending = [frame], [keys], len(keys)
+
+    def rows(self):
+        if not self.frames:
+            return None
+        self._compact()
+        return self.frames[0]
+
+def _class_counts(parquet, target_column, batch_size):
+    # Only the target column is decoded for the counting pass, which stops
+    # as soon as the target has too many distinct values to be classes
+    counts = pd.Series(dtype="int64")
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=[target_column]):
+        counts = counts.add(batch.column(0).to_pandas().value_counts(dropna=False), fill_value=0)
+        if len(counts) > MAX_CLASSES:
+            raise ValueError(f"Target column '{target_column}' has more than {MAX_CLASSES} distinct values.")
+    labels = counts.index.dropna().to_numpy()
+    kind = type_of_target(labels) if len(labels) else "binary"
+    if kind not in ("binary", "multiclass"):
+        raise ValueError(f"Unknown label type: {kind}")
+    return counts.astype("int64")
+
+def stratified_sample(local_path, target_column, sample_rows, batch_size=SCORE_BATCH_ROWS, seed=42):
+    """Stratified sample of at most `sample_rows` rows, streamed by row group.
+
+    A first pass counts the target classes, giving each class a quota
+    proportional to its share (at least MIN_CLASS_ROWS, or all of its rows).
+    A second pass keeps a priority reservoir per class, so memory holds the
+    sample plus one batch. Returns the sample in file order and the counts.
+    """
+    parquet = pq.ParquetFile(local_path)
+    counts = _class_counts(parquet, target_column, batch_size)
+    total = int(counts.sum())
+    quotas = {
+        label: int(min(n, max(round(sample_rows * n / max(total, 1)), MIN_CLASS_ROWS)))
+        for label, n in counts.items()
+    }
+    reservoirs = [_ClassReservoir(quota) for quota in quotas.values()]
+    labels = pd.Index(counts.index)
+
+    rng = np.random.default_rng(seed)
+    rows = 0
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        frame = batch.to_pandas().set_axis(pd.RangeIndex(rows, rows + batch.num_rows))
+        rows += batch.num_rows
+        keys = rng.random(len(frame))
+        # Split the batch by class once: rows sorted by class code, one slice each
+        codes = labels.get_indexer(frame[target_column])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(reservoirs) + 1))
+        for code, reservoir in enumerate(reservoirs):
+            rows_of_class = order[bounds[code]:bounds[code + 1]]
+            if len(rows_of_class):
+                reservoir.add(frame.iloc[rows_of_class], keys[rows_of_class])
+
+    kept = [frame for frame in (r.rows() for r in reservoirs) if frame is not None]
+    sample = pd.concat(kept).sort_index() if kept else parquet.schema_arrow.empty_table().to_pandas()
+    return sample, counts
+
+def _cross_validate(model, X, y, folds):
+    # Refit the fitted configuration (including any budget-truncated size)
+    # on each fold of the training split; the holdout stays untouched. Folds
+    # are not parallelised around an estimator that is: that would start
+    # CV_N_JOBS x n_jobs workers on the same cores.
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    inner = [v for k, v in model.get_params().items() if k.split("__")[-1] == "n_jobs"]
+    n_jobs = 1 if any(effective_n_jobs(v) > 1 for v in inner) else CV_N_JOBS
+    scores = cross_validate(clone(model), X, y, cv=splitter, scoring=CV_SCORING, n_jobs=n_jobs)
+    return {
+        "folds": folds,
+        **{name: {"mean": float(scores[f"test_{name}"].mean()), "std": float(scores[f"test_{name}"].std())}
+           for name in CV_SCORING},
+        "fit_seconds": round(float(scores["fit_time"].sum()), 3),
+    }
+
+def _train(bucket_name, scaled_blob_path, target_column, params, tmpdir, backend="auto", time_budget=None,
+           sample_rows=None, cv_folds=None):
+    if backend != "auto" and backend not in TRAINING_BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'; expected auto or one of {sorted(TRAINING_BACKENDS)}")
+    params = dict(params or {})
+    time_budget = TRAINING_TIME_BUDGET_S if time_budget is None else float(time_budget)
+    sample_rows = TRAINING_SAMPLE_ROWS if sample_rows is None else int(sample_rows)
+    fingerprint = dataset_fingerprint(bucket_name, scaled_blob_path)
+    model_id = model_key(fingerprint, target_column, {
+        "backend": backend, **params, "time_budget_s": time_budget, "test_size": TEST_SIZE,
+        "sample_rows": sample_rows, "cv_folds": cv_folds, "scaled_backends": sorted(SCALED_BACKENDS),
+    })
+    registry = ModelRegistry()
+
+    entry = registry.load(model_id)
+    if entry is not None:
+        return model_id, entry, True
+
+    local_path = _fetch(bucket_name, scaled_blob_path, fingerprint, tmpdir)
+    if target_column not in pq.ParquetFile(local_path).schema_arrow.names:
+        raise ValueError(f"Target column '{target_column}' not found.")
+
+    df, counts = stratified_sample(local_path, target_column, sample_rows)
+    X = df.drop(columns=[target_column])
+    y = df[target_column]
+
+    # Stratified holdout from the sample; the model never sees these rows
+    stratify = y if len(counts) > 1 and (y.value_counts() >= 2).all() else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=42, stratify=stratify)
+
+    # Auto-selected backends are resolved from the data, so the same request
+    # on the same data version always maps to the same model
+    if backend == "auto":
+        backend = select_backend(len(X_train), X_train.shape[1])
+    estimator, defaults = TRAINING_BACKENDS[backend]
+    params = {**defaults, **params}
+    try:
+        model = estimator(**params)
+    except TypeError as e:
+        raise ValueError(f"Invalid params for backend '{backend}': {e}")
+    if backend in SCALED_BACKENDS:
+        model = make_pipeline(StandardScaler(), model)
+    training = _fit(backend, model, X_train, y_train, time_budget)
+    logging.info(f"🧠 Trained {backend} on {len(X_train)} of {int(counts.sum())} rows x {X_train.shape[1]} features in {training['fit_seconds']}s")
+
+    metadata = {
+        "dataset": fingerprint,
+        "target_column": target_column,
+        "features": X.columns.tolist(),
+        "backend": backend,
+        "params": params,
+        "training": training,
+        "sample": {
+            "total_rows": int(counts.sum()),
+            "sample_rows": len(df),
+            "train_rows": len(X_train),
+            "holdout_rows": len(X_test),
+            "class_rows": {str(label): int(n) for label, n in counts.items()},
+        },
+        "holdout": classification_report(y_test, model.predict(X_test), output_dict=True, zero_division=0),
+    }
+    if cv_folds:
+        metadata["cross_validation"] = _cross_validate(model, X_train, y_train, int(cv_folds))
+    registry.save(model_id, model, metadata)
+    return model_id, {"model": model, "metadata": metadata}, False
+
+def train_model(bucket_name, scaled_blob_path, target_column, params=None, backend="auto", time_budget=None,
+                sample_rows=None, cv_folds=None):
     with tempfile.TemporaryDirectory() as tmpdir:
-        # Download scaled-data
-        local_path = os.path.join(tmpdir, "scaled.parquet")
-        download_blob(bucket_name, scaled_blob_path, local_path)
+        model_id, entry, cached = _train(bucket_name, scaled_blob_path, target_column, params, tmpdir,
+                                         backend=backend, time_budget=time_budget, sample_rows=sample_rows,
+                                         cv_folds=cv_folds)
 
-        df = pd.read_parquet(local_path)
+    metadata = entry["metadata"]
+    return {
+        "message": "✅ Model ready." if cached else "✅ Model trained.",
+        "model_id": model_id,
+        "model_cached": cached,
+        "target_used": target_column,
+        "features": metadata["features"],
+        "backend": metadata["backend"],
+        "params": metadata["params"],
+        "training": metadata["training"],
+        "sample": metadata["sample"],
+        "holdout": metadata["holdout"],
+        "cross_validation": metadata.get("cross_validation"),
+    }
 
-        if target_column not in df.columns:
-            raise ValueError(f"Target column '{target_column}' not found.")
+def _check_output(output):
+    if output not in PREDICTION_OUTPUTS:
+        raise ValueError(f"Unknown output '{output}'; expected one of {list(PREDICTION_OUTPUTS)}")
 
-        X = df.drop(columns=[target_column])
-        y = df[target_column]
+def _predict_batch(model, X, probabilities):
+    # One pass through the model: labels are the argmax of the probabilities
+    if probabilities and hasattr(model, "predict_proba"):
+        if len(X) == 0:
+            return model.classes_[:0], np.empty((0, len(model.classes_)))
+        proba = model.predict_proba(X)
+        return model.classes_.take(proba.argmax(axis=1)), proba
+    if len(X) == 0:
+        return model.classes_[:0], None
+    return model.predict(X), None
 
-        # Train-test split (just for internal quality check)
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+def _score_tables(model, features, table, offset, output, key_columns):
+    # Returns the Parquet output table and the compact (key, prediction[,
+    # probabilities]) table for one batch
+    predictions, proba = _predict_batch(model, table.select(features).to_pandas(), output == "compact")
+    if key_columns:
+        compact = table.select(key_columns)
+    else:
+        compact = pa.table({"row": pa.array(np.arange(offset, offset + table.num_rows, dtype="int64"))})
+    compact = compact.append_column("prediction", pa.array(predictions))
+    if proba is not None:
+        for i, label in enumerate(model.classes_):
+            compact = compact.append_column(f"proba_{label}", pa.array(proba[:, i]))
+    if output == "compact":
+        return compact, compact
 
-        # Train a simple classification model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+    if "prediction" in table.column_names:
+        table = table.drop(["prediction"])
+    return table.append_column("prediction", pa.array(predictions)), compact
 
-        predictions = model.predict(X)
+def _score_file(model, features, local_path, bucket_name, output_blob, batch_size, output="full",
+                key_columns=None, json_blob=None):
+    # Stream local_path through the model into output_blob, one batch at a
+    # time; json_blob, if given, receives the compact rows as NDJSON
+    parquet = pq.ParquetFile(local_path)
+    key_columns = list(key_columns or [])
+    missing = [col for col in features + key_columns if col not in parquet.schema_arrow.names]
+    if missing:
+        raise ValueError(f"Columns not found: {missing}")
 
-        df["prediction"] = predictions
+    # Compact output only needs the features and keys decoded
+    columns = None if output == "full" else list(dict.fromkeys(features + key_columns))
+    bucket = storage.Client().bucket(bucket_name)
+    rows = 0
+    with ExitStack() as stack:
+        # Both outputs are staged, so a failing batch never replaces them
+        sink = stack.enter_context(staged_blob_writer(
+            bucket, output_blob, content_type="application/octet-stream", chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True))
+        json_sink = None
+        if json_blob:
+            json_sink = stack.enter_context(staged_blob_writer(
+                bucket, json_blob, content_type="application/x-ndjson", chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True))
 
-        # Save output
-        predictions_parquet_path = os.path.join(tmpdir, "predictions.parquet")
-        predictions_json_path = os.path.join(tmpdir, "predictions.json")
-        df.to_parquet(predictions_parquet_path, index=False)
-        df[["prediction"]].to_json(predictions_json_path, orient="records", lines=False)
+        writer = None
+        tables = (pa.Table.from_batches([batch]) for batch in parquet.iter_batches(batch_size=batch_size, columns=columns))
+        for table in tables:
+            out, compact = _score_tables(model, features, table, rows, output, key_columns)
+            if writer is None:
+                writer = stack.enter_context(pq.ParquetWriter(sink, schema=out.schema, compression="snappy"))
+            writer.write_table(out)
+            if json_sink is not None:
+                json_sink.write(compact.to_pandas().to_json(orient="records", lines=True, date_format="iso", double_precision=15).encode())
+            rows += table.num_rows
+        if writer is None:
+            # Empty input: still produce a readable, empty output file
+            empty = parquet.schema_arrow.empty_table()
+            out, _ = _score_tables(model, features, empty.select(columns) if columns else empty, 0, output, key_columns)
+            stack.enter_context(pq.ParquetWriter(sink, schema=out.schema))
+    return rows
 
-        user_prefix = os.path.dirname(scaled_blob_path)
-        upload_blob(bucket_name, predictions_parquet_path, f"{user_prefix}/predictions.parquet")
-        upload_blob(bucket_name, predictions_json_path, f"{user_prefix}/predictions.json")
+def score_parquet(bucket_name, model_id, blob_path, output_blob=None, batch_size=SCORE_BATCH_ROWS, output="full",
+                  key_columns=None, json_output=False):
+    """Apply a stored model to a Parquet file without loading it whole: row
+    groups are read, predicted and appended to the output in batches."""
+    _check_output(output)
+    entry = ModelRegistry().load(model_id)
+    if entry is None:
+        raise LookupError(f"Model '{model_id}' not found.")
+    model, features = entry["model"], entry["metadata"]["features"]
+    output_blob = output_blob or f"{os.path.dirname(blob_path)}/predictions.parquet".lstrip("/")
+    json_blob = f"{os.path.splitext(output_blob)[0]}.ndjson" if json_output else None
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        local_path = os.path.join(tmpdir, "score.parquet")
+        download_blob(bucket_name, blob_path, local_path)
+        rows = _score_file(model, features, local_path, bucket_name, output_blob, batch_size,
+                           output=output, key_columns=key_columns, json_blob=json_blob)
+
+    logging.info(f"✅ Scored {rows} rows with model {model_id} into {output_blob}")
+    return {
+        "message": "✅ Scoring completed.",
+        "model_id": model_id,
+        "rows": rows,
+        "output": output,
+        "parquet": output_blob,
+        "json": json_blob,
+    }
 
-        return {
-            "message": "✅ Prediction completed.",
+def predict_from_parquet(bucket_name, scaled_blob_path, target_column, params=None, backend="auto", time_budget=None,
+                         sample_rows=None, cv_folds=None, full_prediction=True, output="full", key_columns=None,
+                         json_output=True):
+    """Train (or reuse) a model and report its quality on the holdout split.
+    With full_prediction, the whole file is also scored in batches."""
+    _check_output(output)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_id, entry, cached = _train(bucket_name, scaled_blob_path, target_column, params, tmpdir,
+                                         backend=backend, time_budget=time_budget, sample_rows=sample_rows,
+                                         cv_folds=cv_folds)
+        model, metadata = entry["model"], entry["metadata"]
+
+        result = {
+            "message": "✅ Prediction completed." if full_prediction else "✅ Evaluation completed.",
             "target_used": target_column,
-            "parquet": f"{user_prefix}/predictions.parquet",
-            "json": f"{user_prefix}/predictions.json",
-            "report": classification_report(y, predictions, output_dict=True)
+            "model_id": model_id,
+            "model_cached": cached,
+            "backend": metadata["backend"],
+            "sample": metadata["sample"],
+            "evaluation": "holdout",
+            "report": metadata["holdout"],
+            "cross_validation": metadata.get("cross_validation"),
         }
+        if not full_prediction:
+            return result
+
+        # Score the full file in batches, streaming both outputs
+        local_path = _fetch(bucket_name, scaled_blob_path, metadata["dataset"], tmpdir)
+        user_prefix = os.path.dirname(scaled_blob_path)
+        json_blob = f"{user_prefix}/predictions.ndjson" if json_output else None
+        rows = _score_file(
+            model, metadata["features"], local_path, bucket_name, f"{user_prefix}/predictions.parquet",
+            SCORE_BATCH_ROWS, output=output, key_columns=key_columns, json_blob=json_blob,
+        )
+
+        result.update({
+            "rows_scored": rows,
+            "output": output,
+            "parquet": f"{user_prefix}/predictions.parquet",
+            "json": json_blob,
+        })
+        return result
 
 # Local test runner
 if __name__ == "__main__":
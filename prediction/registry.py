@@ -0,0 +1,142 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import joblib
+from google.cloud import storage
+
+# Models are only ever read from and written to storage the service owns:
+# this bucket, or a local directory standing in for it (tests, local runs).
+# Never the caller's bucket, since loading a model unpickles it.
+MODEL_REGISTRY_BUCKET = os.environ.get("MODEL_REGISTRY_BUCKET", "datumsync")
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR")
+MODEL_REGISTRY_PREFIX = os.environ.get("MODEL_REGISTRY_PREFIX", "models/")
+# Fitted models kept deserialized in memory; least recently used is evicted first
+MODEL_CACHE_SIZE = int(os.environ.get("MODEL_CACHE_SIZE", 8))
+MODEL_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def valid_model_id(model_id: Any) -> bool:
+    return isinstance(model_id, str) and MODEL_ID_PATTERN.fullmatch(model_id) is not None
+
+
+def dataset_fingerprint(bucket_name: str, blob_name: str) -> Dict[str, Any]:
+    """Identify one exact version of a GCS object without reading its data."""
+    blob = storage.Client().bucket(bucket_name).get_blob(blob_name)
+    if blob is None:
+        raise FileNotFoundError(f"gs://{bucket_name}/{blob_name}")
+    return {
+        "uri": f"gs://{bucket_name}/{blob_name}",
+        "generation": blob.generation,
+        "md5": blob.md5_hash or blob.crc32c,
+        "size": blob.size,
+    }
+
+
+def model_key(fingerprint: Dict[str, Any], target_column: str, params: Dict[str, Any]) -> str:
+    """Registry id: same data version, target and hyperparameters -> same model."""
+    payload = json.dumps(
+        {"data": fingerprint, "target": target_column, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class _LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+_hot = _LRU(MODEL_CACHE_SIZE)
+
+
+class ModelRegistry:
+    """Fitted models persisted with joblib, as {prefix}{model_id}.joblib in
+    MODEL_REGISTRY_BUCKET (or MODEL_REGISTRY_DIR), fronted by an in-memory LRU."""
+
+    def __init__(self, bucket_name: str = MODEL_REGISTRY_BUCKET, local_dir: Optional[str] = MODEL_REGISTRY_DIR,
+                 prefix: str = MODEL_REGISTRY_PREFIX):
+        self.bucket_name = bucket_name
+        self.local_dir = local_dir
+        self.prefix = prefix
+
+    def _location(self, model_id: str) -> str:
+        # Ids are hex digests; anything else could name a path outside the registry
+        if not valid_model_id(model_id):
+            raise ValueError(f"Invalid model id '{model_id}'.")
+        if self.local_dir:
+            return os.path.join(self.local_dir, f"{model_id}.joblib")
+        return f"{self.prefix}{model_id}.joblib"
+
+    def _cache_key(self, model_id: str) -> str:
+        return f"{self.local_dir or self.bucket_name}/{model_id}"
+
+    def load(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Return {"model", "metadata"} for a stored model, or None."""
+        if not valid_model_id(model_id):
+            return None
+        entry = _hot.get(self._cache_key(model_id))
+        if entry is not None:
+            return entry
+
+        location = self._location(model_id)
+        if self.local_dir:
+            if not os.path.exists(location):
+                return None
+            entry = joblib.load(location)
+        else:
+            blob = storage.Client().bucket(self.bucket_name).blob(location)
+            if not blob.exists():
+                return None
+            with tempfile.TemporaryDirectory() as tmpdir:
+                local_path = os.path.join(tmpdir, "model.joblib")
+                blob.download_to_filename(local_path)
+                entry = joblib.load(local_path)
+
+        logging.info(f"📦 Loaded model {model_id} from {location}")
+        _hot.put(self._cache_key(model_id), entry)
+        return entry
+
+    def save(self, model_id: str, model: Any, metadata: Dict[str, Any]) -> str:
+        entry = {"model": model, "metadata": metadata}
+        location = self._location(model_id)
+        if self.local_dir:
+            os.makedirs(self.local_dir, exist_ok=True)
+            # Write then rename, so a concurrent load never sees a partial file
+            partial = f"{location}.{os.getpid()}.tmp"
+            joblib.dump(entry, partial, compress=3)
+            os.replace(partial, location)
+        else:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                local_path = os.path.join(tmpdir, "model.joblib")
+                joblib.dump(entry, local_path, compress=3)
+                storage.Client().bucket(self.bucket_name).blob(location).upload_from_filename(local_path)
+
+        logging.info(f"💾 Saved model {model_id} to {location}")
+        _hot.put(self._cache_key(model_id), entry)
+        return location
@@ -1,14 +1,21 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
-from validation import validate
+from validation import validate_path, get_rule_set, cost_summary, VALIDATION_MODES
+from reconciliation import reconcile_files, SAMPLE_SIZE
 from google.cloud import storage
-import pandas as pd
+from google.cloud import logging as cloud_logging
 import os
 import json
+import logging
+import tempfile
 
 app = FastAPI()
+cloud_logging.Client().setup_logging()
 
 SUPPORTED_FORMATS = ('.csv', '.json', '.xlsx', '.parquet')
+STREAMING_FORMATS = ('.csv', '.parquet')
+# Files above this size are validated batch by batch instead of loaded whole
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("VALIDATION_STREAMING_BYTES", 256 * 1024 * 1024))
 
 @app.post("/")
 async def validate_file(request: Request):
@@ -30,28 +37,100 @@ async def validate_file(request: Request):
         blob = bucket.blob(file_name)
         blob.download_to_filename(tmp_path)
 
-        # Load file based on extension
-        if file_name.endswith(".csv"):
-            df = pd.read_csv(tmp_path)
-        elif file_name.endswith(".json"):
-            df = pd.read_json(tmp_path)
-        elif file_name.endswith(".xlsx"):
-            df = pd.read_excel(tmp_path)
-        elif file_name.endswith(".parquet"):
-            df = pd.read_parquet(tmp_path)
+        # Compiled rule set, cached and reloaded when its file changes
+        try:
+            rules = get_rule_set(data.get("rule_set"), data.get("rule_set_version"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Unknown rule set: {data.get('rule_set') or 'default'}")
 
-        # Load validation rules
-        with open("validation_rules.json") as f:
-            rules = json.load(f)
+        # Reference tables for foreignKeyMatch: name -> gs:// URI
+        ref_tables = data.get("ref_tables") or {}
 
-        # Run validation
-        result = validate(df, rules)
+        # full, fail_fast (stop at the first failing blocking rule) or sampled
+        mode = data.get("mode", "full")
+        if mode not in VALIDATION_MODES:
+            raise HTTPException(status_code=400, detail="Unknown mode; expected one of full, fail_fast, sampled.")
+
+        streaming = data.get("streaming")
+        if streaming is None:
+            streaming = file_name.endswith(STREAMING_FORMATS) and os.path.getsize(tmp_path) > STREAMING_THRESHOLD_BYTES
+        if streaming and not file_name.endswith(STREAMING_FORMATS):
+            raise HTTPException(status_code=400, detail="Streaming validation supports CSV and Parquet files only.")
+
+        # Run validation, decoding only the columns and row groups the rules need
+        result = validate_path(
+            tmp_path,
+            rules,
+            ref_tables,
+            streaming=streaming,
+            mode=mode,
+            sample_size=data.get("sample_size"),
+        )
 
         # Save results to GCS
         result_blob = bucket.blob(f"validation-results/{file_name}.results.json")
         result_blob.upload_from_string(json.dumps(result, indent=2))
 
-        return JSONResponse(content={"status": "success", "file": file_name})
+        # Per-rule cost, as a structured log entry for log-based metrics
+        summary = cost_summary(result)
+        logging.info(f"📊 Validated {file_name} in {summary['wall_time_s']}s", extra={"json_fields": {
+            "metric": "validation_cost", "file": file_name, "rule_set": data.get("rule_set") or "default",
+            "rule_set_version": rules.version, "mode": mode, **summary,
+        }})
+
+        return JSONResponse(content={"status": "success", "file": file_name, "cost_summary": summary})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/reconcile")
+async def reconcile(request: Request):
+    try:
+        data = await request.json()
+        bucket_name = data.get("bucket")
+        source_name = data.get("source")
+        target_name = data.get("target")
+
+        if not bucket_name or not source_name or not target_name:
+            raise HTTPException(status_code=400, detail="Missing 'bucket', 'source' or 'target' in request body.")
+
+        if not source_name.endswith(SUPPORTED_FORMATS) or not target_name.endswith(SUPPORTED_FORMATS):
+            raise HTTPException(status_code=400, detail="Unsupported file format.")
+
+        client = storage.Client()
+        bucket = client.bucket(bucket_name)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Download both files from GCS
+            source_path = os.path.join(tmpdir, "source-" + os.path.basename(source_name))
+            target_path = os.path.join(tmpdir, "target-" + os.path.basename(target_name))
+            bucket.blob(source_name).download_to_filename(source_path)
+            bucket.blob(target_name).download_to_filename(target_path)
+
+            # Hash-partitioned row diff, matched on key columns when given
+            result = reconcile_files(
+                source_path,
+                target_path,
+                key_columns=data.get("key_columns"),
+                sample_size=data.get("sample_size", SAMPLE_SIZE),
+            )
+
+        # Save results to GCS
+        result_path = f"reconciliation-results/{source_name}.reconciliation.json"
+        bucket.blob(result_path).upload_from_string(json.dumps(result, indent=2))
+
+        summary = {k: v for k, v in result.items() if k.endswith("_rows") or k.startswith("duplicate_keys")}
+        return JSONResponse(content={"status": "success", "source": source_name, "target": target_name,
+                                     "result_path": result_path, "summary": summary})
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,259 @@
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from typing import Any, Dict, Iterator, List, Optional
+
+from validation import iter_batches, STREAM_BATCH_ROWS
+
+# Hash partitions spilled to disk per side; each is reconciled on its own, so
+# memory stays around 1/P of the rows (24 bytes per row) at any time
+RECONCILE_PARTITIONS = int(os.environ.get("RECONCILE_PARTITIONS", 64))
+# Example rows reported per difference category
+SAMPLE_SIZE = 20
+
+# One spilled record per row: key hash, full-row hash, row offset in its file
+_RECORD = np.dtype([("key", "<u8"), ("row", "<u8"), ("offset", "<i8")])
+
+
+def _iter_frames(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    if path.endswith(".csv"):
+        # Exact float parsing, so CSV values hash equal to Parquet/JSON ones
+        yield from pd.read_csv(path, chunksize=batch_size, float_precision="round_trip")
+        return
+    elif path.endswith(".parquet"):
+        yield from iter_batches(path, batch_size)
+        return
+    # JSON and Excel cannot be read incrementally
+    df = pd.read_json(path) if path.endswith(".json") else pd.read_excel(path)
+    for start in range(0, max(len(df), 1), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+def _read_columns(path: str) -> List[str]:
+    if path.endswith(".csv"):
+        return list(pd.read_csv(path, nrows=0).columns)
+    elif path.endswith(".parquet"):
+        return list(pq.ParquetFile(path).schema_arrow.empty_table().to_pandas().columns)
+    return list(next(_iter_frames(path, 1)).columns)
+
+
+# Integers beyond this lose precision as float64
+_EXACT_FLOAT_INT = 2 ** 53
+
+
+def _integer_overflow(series: pd.Series):
+    # Integral values float64 cannot hold exactly, as (row mask, int64 values).
+    # Decided per value, so the result never depends on how rows are batched.
+    if pd.api.types.is_integer_dtype(series):
+        values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0) if series.hasnans else series.to_numpy()
+        mask = (values > _EXACT_FLOAT_INT) | (values < -_EXACT_FLOAT_INT)
+        if series.hasnans:
+            mask &= ~series.isna().to_numpy()
+        return mask, values[mask]
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        magnitude = np.abs(values)
+        mask = (magnitude > _EXACT_FLOAT_INT) & (magnitude < 2.0 ** 63)
+        return mask, values[mask].astype("int64")
+    return None, None
+
+
+def _hash_rows(frame: pd.DataFrame) -> np.ndarray:
+    # Numbers hash as float64, so a column read as int64 in one chunk and as
+    # float64 (because of a null) in another still compares equal. Integers
+    # beyond 2**53 also mix in their exact int64 hash, so large keys that
+    # share a float64 value stay distinct.
+    canonical, overflow = {}, []
+    for position, col in enumerate(frame.columns):
+        series = frame[col]
+        mask, exact = _integer_overflow(series)
+        if mask is None:
+            canonical[col] = series
+            continue
+        as_float = series.to_numpy(dtype="float64", na_value=np.nan)
+        if mask.any():
+            as_float = as_float.copy()
+            as_float[mask] = np.nan
+            overflow.append((position, mask, exact))
+        canonical[col] = as_float
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(canonical, index=frame.index), index=False).to_numpy()
+    for position, mask, exact in overflow:
+        mixed = pd.util.hash_array(exact) + np.uint64(position)
+        hashes[mask] = hashes[mask] * np.uint64(1000003) ^ mixed
+    return hashes
+
+
+def _partition(path: str, columns: List[str], key_columns: Optional[List[str]], spill_dir: str,
+               side: str, partitions: int, batch_size: int) -> int:
+    files = [open(os.path.join(spill_dir, f"{side}-{p}.bin"), "wb") for p in range(partitions)]
+    rows = 0
+    try:
+        for batch in _iter_frames(path, batch_size):
+            if batch.empty:
+                continue
+            records = np.empty(len(batch), dtype=_RECORD)
+            records["row"] = _hash_rows(batch[columns])
+            records["key"] = _hash_rows(batch[key_columns]) if key_columns else records["row"]
+            records["offset"] = np.arange(rows, rows + len(batch))
+
+            part = records["key"] % np.uint64(partitions)
+            order = np.argsort(part, kind="stable")
+            bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+            for p in range(partitions):
+                if bounds[p] < bounds[p + 1]:
+                    records[order[bounds[p]:bounds[p + 1]]].tofile(files[p])
+            rows += len(batch)
+    finally:
+        for f in files:
+            f.close()
+    return rows
+
+
+class _Sample:
+    """Bounded, deterministic sample: keeps the n entries with the smallest
+    key hash seen so far."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.keys = np.empty(0, dtype="<u8")
+        self.source = np.empty(0, dtype="<i8")
+        self.target = np.empty(0, dtype="<i8")
+
+    def add(self, keys: np.ndarray, source: np.ndarray, target: np.ndarray) -> None:
+        if self.n <= 0 or len(keys) == 0:
+            return
+        keys = np.concatenate([self.keys, keys])
+        source = np.concatenate([self.source, source])
+        target = np.concatenate([self.target, target])
+        keep = np.argsort(keys, kind="stable")[:self.n]
+        self.keys, self.source, self.target = keys[keep], source[keep], target[keep]
+
+
+def _compare_keyed(src: np.ndarray, tgt: np.ndarray, stats: Dict[str, int], samples: Dict[str, _Sample]) -> None:
+    # First occurrence wins for duplicate keys
+    src_keys, src_first = np.unique(src["key"], return_index=True)
+    tgt_keys, tgt_first = np.unique(tgt["key"], return_index=True)
+    stats["duplicate_keys_source"] += len(src) - len(src_keys)
+    stats["duplicate_keys_target"] += len(tgt) - len(tgt_keys)
+    src, tgt = src[src_first], tgt[tgt_first]
+
+    _, si, ti = np.intersect1d(src_keys, tgt_keys, assume_unique=True, return_indices=True)
+    missing = np.delete(src, si)
+    extra = np.delete(tgt, ti)
+    changed = src["row"][si] != tgt["row"][ti]
+
+    stats["missing_rows"] += len(missing)
+    stats["extra_rows"] += len(extra)
+    stats["changed_rows"] += int(changed.sum())
+    stats["matched_rows"] += int((~changed).sum())
+
+    samples["missing"].add(missing["key"], missing["offset"], np.full(len(missing), -1))
+    samples["extra"].add(extra["key"], np.full(len(extra), -1), extra["offset"])
+    samples["changed"].add(src["key"][si][changed], src["offset"][si][changed], tgt["offset"][ti][changed])
+
+
+def _compare_rows(src: np.ndarray, tgt: np.ndarray, stats: Dict[str, int], samples: Dict[str, _Sample]) -> None:
+    # Without keys rows are compared as multisets of row hashes
+    src_rows, src_counts = np.unique(src["row"], return_counts=True)
+    tgt_rows, tgt_counts = np.unique(tgt["row"], return_counts=True)
+    _, si, ti = np.intersect1d(src_rows, tgt_rows, assume_unique=True, return_indices=True)
+    matched = int(np.minimum(src_counts[si], tgt_counts[ti]).sum())
+
+    stats["matched_rows"] += matched
+    stats["missing_rows"] += len(src) - matched
+    stats["extra_rows"] += len(tgt) - matched
+
+    missing = src[~np.isin(src["row"], tgt_rows, assume_unique=False)]
+    extra = tgt[~np.isin(tgt["row"], src_rows, assume_unique=False)]
+    samples["missing"].add(missing["row"], missing["offset"], np.full(len(missing), -1))
+    samples["extra"].add(extra["row"], np.full(len(extra), -1), extra["offset"])
+
+
+def _fetch_rows(path: str, offsets: np.ndarray, batch_size: int) -> Dict[int, Dict[str, Any]]:
+    wanted = np.unique(offsets[offsets >= 0])
+    found: Dict[int, Dict[str, Any]] = {}
+    if len(wanted) == 0:
+        return found
+    start = 0
+    for batch in _iter_frames(path, batch_size):
+        end = start + len(batch)
+        hit = wanted[(wanted >= start) & (wanted < end)]
+        if len(hit):
+            records = json.loads(batch.iloc[hit - start].to_json(orient="records", date_format="iso", double_precision=15))
+            found.update(zip(hit.tolist(), records))
+        start = end
+        if start > wanted[-1]:
+            break
+    return found
+
+
+def reconcile_files(
+    source_path: str,
+    target_path: str,
+    key_columns: Optional[List[str]] = None,
+    sample_size: int = SAMPLE_SIZE,
+    partitions: int = RECONCILE_PARTITIONS,
+    batch_size: int = STREAM_BATCH_ROWS,
+) -> Dict[str, Any]:
+    """Compare a source and a target file row by row.
+
+    With key_columns, rows are matched on their keys and reported as missing
+    (source only), extra (target only) or changed (same key, different
+    values). Without keys, whole rows are matched as multisets. Rows are
+    hashed batch by batch and spilled into hash partitions on local disk, so
+    memory stays bounded regardless of file size.
+    """
+    source_columns = _read_columns(source_path)
+    target_columns = _read_columns(target_path)
+    columns = [col for col in source_columns if col in target_columns]
+    key_columns = list(key_columns or [])
+    missing_keys = [col for col in key_columns if col not in columns]
+    if missing_keys:
+        raise ValueError(f"Key columns not found in both files: {missing_keys}")
+
+    stats = {
+        "matched_rows": 0,
+        "missing_rows": 0,
+        "extra_rows": 0,
+        "changed_rows": 0,
+        "duplicate_keys_source": 0,
+        "duplicate_keys_target": 0,
+    }
+    samples = {name: _Sample(sample_size) for name in ("missing", "extra", "changed")}
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        source_rows = _partition(source_path, columns, key_columns, spill_dir, "source", partitions, batch_size)
+        target_rows = _partition(target_path, columns, key_columns, spill_dir, "target", partitions, batch_size)
+
+        for p in range(partitions):
+            src = np.fromfile(os.path.join(spill_dir, f"source-{p}.bin"), dtype=_RECORD)
+            tgt = np.fromfile(os.path.join(spill_dir, f"target-{p}.bin"), dtype=_RECORD)
+            if key_columns:
+                _compare_keyed(src, tgt, stats, samples)
+            else:
+                _compare_rows(src, tgt, stats, samples)
+
+    # Second, targeted pass: only the sampled rows are materialized
+    source_found = _fetch_rows(source_path, np.concatenate([s.source for s in samples.values()]), batch_size)
+    target_found = _fetch_rows(target_path, np.concatenate([s.target for s in samples.values()]), batch_size)
+
+    return {
+        "source_rows": source_rows,
+        "target_rows": target_rows,
+        "key_columns": key_columns,
+        "compared_columns": columns,
+        "columns_only_in_source": [col for col in source_columns if col not in target_columns],
+        "columns_only_in_target": [col for col in target_columns if col not in source_columns],
+        **stats,
+        "samples": {
+            "missing": [{"row": int(o), "source": source_found.get(int(o))} for o in samples["missing"].source],
+            "extra": [{"row": int(o), "target": target_found.get(int(o))} for o in samples["extra"].target],
+            "changed": [
+                {"source_row": int(s), "target_row": int(t), "source": source_found.get(int(s)), "target": target_found.get(int(t))}
+                for s, t in zip(samples["changed"].source, samples["changed"].target)
+            ],
+        },
+    }
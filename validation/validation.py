@@ -1,152 +1,1678 @@
+import io
+import os
+import ast
+import json
+import logging
 import pandas as pd
 import numpy as np
 import re
-from typing import Dict, List, Any
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from functools import lru_cache, reduce
+from google.cloud import storage
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 
 
-def validate(df: pd.DataFrame, checks: Dict[str, Any], ref_data: Dict[str, pd.DataFrame] = {}) -> List[Dict[str, Any]]:
-    results = []
+# Shared column aggregates. Each is computed at most once per column per run,
+# however many constraints read it.
+AGGREGATES: Dict[str, Callable[[pd.Series], Any]] = {
+    "rows": len,
+    "nulls": lambda s: s.isnull().sum(),
+    "mean": lambda s: s.mean(),
+    "std": lambda s: s.std(),
+    "min": lambda s: s.min(),
+    "max": lambda s: s.max(),
+    "duplicates": lambda s: s.duplicated().sum(),
+    "latest": lambda s: pd.to_datetime(s).max(),
+}
 
-    for constraint in checks.get("constraints", []):
-        ctype = constraint.get("type")
-        column = constraint.get("column")
-        result = {
-            "type": ctype,
-            "column": column,
-            "status": "PASS",
-            "description": "",
-        }
+# statCheck metrics answered from the shared aggregates
+STAT_METRICS = ("mean", "std", "min", "max")
+
+# Checks answered from the column header alone, without reading data
+SCHEMA_CHECKS = ("hasColumnCount", "hasColumnNames")
+# Checks whose violations are the column's null values
+NULL_CHECKS = ("isNullable", "isComplete", "percentComplete")
+
+# Offending rows kept per failing constraint; a rule set overrides it with a
+# top-level "violation_samples"
+VIOLATION_SAMPLES = int(os.environ.get("VALIDATION_VIOLATION_SAMPLES", 5))
+
+# Aggregates each check type reads from its column
+CHECK_AGGREGATES: Dict[str, Tuple[str, ...]] = {
+    "isNullable": ("nulls",),
+    "isComplete": ("nulls",),
+    "percentComplete": ("rows", "nulls"),
+    "isUnique": ("duplicates",),
+    "isWithinRange": ("min", "max"),
+    "outlierZScore": ("mean", "std", "min", "max"),
+    "valueDriftCheck": ("mean",),
+    "isFresh": ("latest",),
+}
+
+
+class ValidationPlan:
+    """A rule set compiled once: constraints grouped by column, with the
+    aggregates each column needs and any regexes precompiled."""
+
+    def __init__(self, checks: Dict[str, Any]):
+        self.checks = checks
+        self.version = checks.get("version")
+        self.constraints: List[Dict[str, Any]] = []
+        self.by_column: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self.aggregates: Dict[str, set] = {}
+        self.holistic: set = set()
+        self.sample_size = int(checks.get("violation_samples", VIOLATION_SAMPLES))
+
+        for index, constraint in enumerate(checks.get("constraints", [])):
+            compiled = {
+                "index": index,
+                "type": constraint.get("type"),
+                "column": constraint.get("column"),
+                "spec": constraint,
+                # fail_fast stops at the first failing blocking rule
+                "blocking": bool(constraint.get("blocking", True)),
+                "sample_size": self.sample_size,
+            }
+            if compiled["type"] == "matchesPattern" and "pattern" in constraint:
+                # An invalid regex fails only its own constraint, as ERROR
+                try:
+                    compiled["pattern"], compiled["arrow_pattern"], compiled["arrow_ascii_only"] = \
+                        compile_pattern(constraint["pattern"])
+                except re.error as e:
+                    compiled["pattern_error"] = e
+            if compiled["type"] == "expressionCheck":
+                compiled["program"] = compile_expression(constraint.get("expression", ""))
+            compiled["reads"] = _columns_read(compiled)
+            self.constraints.append(compiled)
+            self.by_column.setdefault(compiled["column"], []).append(compiled)
+
+            if compiled["column"] is not None:
+                needed = self.aggregates.setdefault(compiled["column"], set())
+                needed.update(_aggregates_for(compiled["type"], constraint))
+                if compiled["type"] == "statCheck" and constraint.get("metric") not in STAT_METRICS:
+                    self.holistic.add(compiled["column"])
+
+    def projection(self, header: List[str], answered: Iterable[int] = ()) -> Optional[List[str]]:
+        """Header columns the rule set reads, in file order, leaving out
+        constraints already `answered` by index. Empty when nothing needs
+        decoding; None when every column is needed."""
+        answered = set(answered)
+        referenced: set = set()
+        for c in self.constraints:
+            if c["index"] in answered:
+                continue
+            if c["reads"] is None:
+                return None
+            referenced.update(c["reads"])
+        return [column for column in header if column in referenced]
+
+
+# df.query allows `quoted names` and @local references, which Python does not
+_BACKTICKED = re.compile(r"`([^`]*)`")
+
+
+def expression_columns(expression: str) -> Optional[set]:
+    """Names an expressionCheck reads, or None when it cannot be parsed."""
+    quoted = set(_BACKTICKED.findall(expression))
+    source = _BACKTICKED.sub("_", expression).replace("@", "")
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError:
+        return None
+    return quoted | {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+
+
+# --- Business rule expressions ---
+
+class _Unsupported(Exception):
+    pass
+
+
+_COMPARISONS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_ARITHMETIC = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide}
+
+
+def compile_expression(expression: str) -> Optional[Callable[[Any], Any]]:
+    """Parse an expressionCheck once into a program over numpy column arrays:
+    `and`/`or`/`not` become elementwise mask operations and chained
+    comparisons are split. Programs read columns through `frame.array()` and
+    memoise boolean terms with `frame.memo()`, so rules evaluated over the
+    same frame share column loads and common comparisons. None when the
+    expression uses anything else, which is left to df.eval."""
+    quoted: Dict[str, str] = {}
+
+    def placeholder(match: "re.Match") -> str:
+        name = f"__column{len(quoted)}"
+        quoted[name] = match.group(1)
+        return name
+
+    source = _BACKTICKED.sub(placeholder, expression)
+    if "@" in source:
+        return None
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                node.id = quoted.get(node.id, node.id)
+            # pandas rewrites & and | to and/or, which bind looser than
+            # comparisons; Python's parse of `a == b & c` would not match
+            if isinstance(node, ast.Compare) and any(
+                isinstance(inner, ast.BinOp) and isinstance(inner.op, (ast.BitAnd, ast.BitOr))
+                for inner in ast.walk(node)
+            ):
+                return None
+        return _build(tree.body)
+    except (SyntaxError, _Unsupported):
+        return None
+
+
+def _as_mask(value: Any) -> Any:
+    if isinstance(value, (bool, np.bool_)) or (isinstance(value, np.ndarray) and value.dtype == bool):
+        return value
+    raise TypeError("Expected a boolean operand")
+
+
+def _build(node: ast.AST) -> Callable[[Any], Any]:
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (bool, int, float)):
+            raise _Unsupported(node)
+        value = node.value
+        return lambda frame: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda frame: frame.array(name)
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_build(value) for value in node.values]
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        fn = lambda frame: reduce(op, (_as_mask(part(frame)) for part in parts))
+    elif isinstance(node, ast.UnaryOp):
+        operand = _build(node.operand)
+        if isinstance(node.op, (ast.Not, ast.Invert)):
+            fn = lambda frame: np.logical_not(_as_mask(operand(frame)))
+        elif isinstance(node.op, ast.USub):
+            fn = lambda frame: np.negative(operand(frame))
+        elif isinstance(node.op, ast.UAdd):
+            fn = operand
+        else:
+            raise _Unsupported(node)
+    elif isinstance(node, ast.BinOp):
+        left, right = _build(node.left), _build(node.right)
+        if isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            op = np.logical_and if isinstance(node.op, ast.BitAnd) else np.logical_or
+            fn = lambda frame: op(_as_mask(left(frame)), _as_mask(right(frame)))
+        elif type(node.op) in _ARITHMETIC:
+            op = _ARITHMETIC[type(node.op)]
+
+            def fn(frame):
+                with np.errstate(all="ignore"):
+                    return op(left(frame), right(frame))
+        else:
+            raise _Unsupported(node)
+    elif isinstance(node, ast.Compare):
+        if any(type(op) not in _COMPARISONS for op in node.ops):
+            raise _Unsupported(node)
+        operands = [_build(operand) for operand in [node.left] + node.comparators]
+        pairs = [(_COMPARISONS[type(op)], operands[i], operands[i + 1]) for i, op in enumerate(node.ops)]
+        fn = lambda frame: reduce(np.logical_and, (op(a(frame), b(frame)) for op, a, b in pairs))
+    elif isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id == "abs" and len(node.args) == 1 and not node.keywords):
+            raise _Unsupported(node)
+        argument = _build(node.args[0])
+        fn = lambda frame: np.abs(argument(frame))
+    else:
+        raise _Unsupported(node)
+
+    if not isinstance(node, (ast.Compare, ast.BoolOp)):
+        return fn
+    # Boolean terms are one byte per row, cheap enough to share across rules
+    key = ast.dump(node)
+    return lambda frame: frame.memo(key, fn)
+
+
+def _columns_read(c: Dict[str, Any]) -> Optional[set]:
+    # None when an expression cannot be parsed and any column may be read
+    if c["type"] in SCHEMA_CHECKS:
+        return set()
+    reads = set()
+    if c["type"] == "expressionCheck":
+        reads = expression_columns(c["spec"].get("expression", ""))
+        if reads is None:
+            return None
+    if c["column"] is not None:
+        reads.add(c["column"])
+    return reads
 
-        try:
-            # 1. Schema Validation
-            if ctype == "hasColumnCount":
-                expected = constraint["value"]
-                actual = len(df.columns)
-                if actual != expected:
-                    result["status"] = "FAIL"
-                result["description"] = f"Expected {expected} columns, got {actual}"
-
-            elif ctype == "hasColumnNames":
-                expected = set(constraint["columns"])
-                actual = set(df.columns)
-                if expected != actual:
-                    result["status"] = "FAIL"
-                result["description"] = f"Expected columns {expected}, got {actual}"
-
-            elif ctype == "hasDtype":
-                expected = constraint["dtype"]
-                actual = str(df[column].dtype)
-                if expected != actual:
-                    result["status"] = "FAIL"
-                result["description"] = f"Expected dtype '{expected}', got '{actual}'"
-
-            elif ctype == "isNullable":
-                nullable = constraint["nullable"]
-                nulls = df[column].isnull().sum()
-                if not nullable and nulls > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{nulls} null values found"
-
-            elif ctype == "foreignKeyMatch":
-                foreign_df = ref_data.get(constraint["ref_table"])
-                ref_col = constraint["ref_column"]
-                if foreign_df is not None:
-                    invalid = ~df[column].isin(foreign_df[ref_col])
-                    count = invalid.sum()
-                    if count > 0:
-                        result["status"] = "FAIL"
-                    result["description"] = f"{count} values not found in reference table"
-
-            # 2. Integrity Checks
-            elif ctype == "isUnique":
-                dupes = df[column].duplicated().sum()
-                if dupes > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{dupes} duplicate values"
-
-            elif ctype == "matchesPattern":
-                pattern = re.compile(constraint["pattern"])
-                mismatches = ~df[column].dropna().astype(str).apply(lambda x: bool(pattern.fullmatch(x)))
-                count = mismatches.sum()
-                if count > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{count} values failed pattern match"
-
-            # 3. Quality Checks
-            elif ctype == "isComplete":
-                missing = df[column].isnull().sum()
-                if missing > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{missing} missing values"
-
-            elif ctype == "isWithinRange":
-                min_v = constraint["min"]
-                max_v = constraint["max"]
-                outliers = ((df[column] < min_v) | (df[column] > max_v)).sum()
-                if outliers > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{outliers} values out of range [{min_v}, {max_v}]"
-
-            elif ctype == "outlierZScore":
-                threshold = constraint.get("threshold", 3)
-                z_scores = ((df[column] - df[column].mean()) / df[column].std()).abs()
-                count = (z_scores > threshold).sum()
-                if count > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{count} outliers with z-score > {threshold}"
-
-            # 4. Business Rules
-            elif ctype == "expressionCheck":
-                expr = constraint["expression"]
-                failed = df.query(f"not ({expr})").shape[0]
-                if failed > 0:
-                    result["status"] = "FAIL"
-                result["description"] = f"{failed} rows failed business rule: {expr}"
-
-            # 5. Statistical Checks
-            elif ctype == "statCheck":
-                metric = constraint["metric"]
-                expected = constraint["value"]
-                actual = getattr(df[column], metric)()
-                if not np.isclose(actual, expected, atol=constraint.get("tolerance", 0.01)):
-                    result["status"] = "FAIL"
-                result["description"] = f"{metric}: expected ~{expected}, got {actual}"
-
-            elif ctype == "valueDriftCheck":
-                prev_val = constraint["previous_value"]
-                current_val = df[column].mean()
-                drift = abs(current_val - prev_val)
-                if drift > constraint["threshold"]:
-                    result["status"] = "FAIL"
-                result["description"] = f"Mean drifted by {drift} (threshold={constraint['threshold']})"
-
-            # 6. Timeliness
-            elif ctype == "isFresh":
-                max_age_days = constraint["max_days"]
-                latest = pd.to_datetime(df[column]).max()
-                now = pd.Timestamp.now()
-                age_days = (now - latest).days
-                if age_days > max_age_days:
-                    result["status"] = "FAIL"
-                result["description"] = f"Data is {age_days} days old (limit={max_age_days})"
-
-            # 7. Completeness
-            elif ctype == "percentComplete":
-                threshold = constraint["threshold"]
-                percent = df[column].notnull().mean() * 100
-                if percent < threshold:
-                    result["status"] = "FAIL"
-                result["description"] = f"{percent:.2f}% complete (threshold={threshold}%)"
-
-            else:
-                result["status"] = "UNKNOWN"
-                result["description"] = f"Unknown check type: {ctype}"
 
+def _aggregates_for(ctype: str, constraint: Dict[str, Any]) -> Tuple[str, ...]:
+    if ctype == "statCheck":
+        metric = constraint.get("metric")
+        return (metric,) if metric in STAT_METRICS else ()
+    return CHECK_AGGREGATES.get(ctype, ())
+
+
+# Escapes whose meaning differs between Python re (Unicode-aware) and RE2
+# (ASCII-only). On ASCII text they agree, except that Python's \s also
+# matches the separators in _RE2_UNSAFE_ASCII.
+_RE2_UNSAFE = re.compile(r"\\[dDwWsSbB]")
+_RE2_UNSAFE_SPACE = re.compile(r"\\[sS]")
+_RE2_UNSAFE_ASCII = r"[\x0b\x1c-\x1f]"
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str) -> Tuple["re.Pattern", Optional[str], bool]:
+    """Compile a matchesPattern regex once per process. Also returns an
+    anchored RE2 form for Arrow when RE2 accepts it, and whether that form
+    only means the same as the Python regex on ASCII text."""
+    compiled = re.compile(pattern)
+    arrow_pattern = f"^(?:{pattern})$"
+    try:
+        pc.match_substring_regex(pa.array([""]), arrow_pattern)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return compiled, None, False
+    return compiled, arrow_pattern, _RE2_UNSAFE.search(pattern) is not None
+
+
+def _mismatch_mask(values: pd.Series, pattern: "re.Pattern", arrow_pattern: Optional[str],
+                   ascii_only: bool = False) -> np.ndarray:
+    if arrow_pattern is None:
+        return ~values.str.fullmatch(pattern).to_numpy(dtype=bool)
+    strings = pa.array(values, type=pa.string())
+    mismatch = ~pc.match_substring_regex(strings, arrow_pattern).to_numpy(zero_copy_only=False)
+    if ascii_only:
+        # Only the values RE2 could read differently go through Python re
+        rest = ~pc.string_is_ascii(strings).to_numpy(zero_copy_only=False)
+        if _RE2_UNSAFE_SPACE.search(pattern.pattern):
+            rest |= pc.match_substring_regex(strings, _RE2_UNSAFE_ASCII).to_numpy(zero_copy_only=False)
+        if rest.any():
+            mismatch[rest] = ~values[rest].str.fullmatch(pattern).to_numpy(dtype=bool)
+    return mismatch
+
+
+def compile_rules(checks: Dict[str, Any]) -> ValidationPlan:
+    return checks if isinstance(checks, ValidationPlan) else ValidationPlan(checks)
+
+
+# --- Rule set registry ---
+
+# The "default" rule set; named ones live in RULES_DIR as <name>.json, or
+# <name>/<version>.json when a version is requested
+DEFAULT_RULES_FILE = os.environ.get("VALIDATION_RULES_FILE", "validation_rules.json")
+RULES_DIR = os.environ.get("VALIDATION_RULES_DIR", "rules")
+
+# (name, version) -> {"plan", "path", "mtime"}; path is None for rule sets
+# registered in code, which never reload
+_rule_sets: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+_RULE_SET_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+def _rule_set_path(name: str, version: Optional[str]) -> str:
+    for part in (name, version):
+        if part is not None and (not _RULE_SET_NAME.fullmatch(part) or part.startswith(".")):
+            raise ValueError(f"Invalid rule set name or version: {part}")
+    if name == "default" and version is None:
+        return DEFAULT_RULES_FILE
+    if version is None:
+        return os.path.join(RULES_DIR, f"{name}.json")
+    return os.path.join(RULES_DIR, name, f"{version}.json")
+
+
+def register_rule_set(name: str, checks: Dict[str, Any], version: Optional[str] = None) -> ValidationPlan:
+    plan = compile_rules(checks)
+    _rule_sets[(name, version)] = {"plan": plan, "path": None, "mtime": None}
+    return plan
+
+
+def get_rule_set(name: Optional[str] = None, version: Optional[str] = None) -> ValidationPlan:
+    """Compiled rule set by name/version. File-backed sets are parsed and
+    compiled once, then recompiled only when the file's mtime changes."""
+    key = (name or "default", None if version is None else str(version))
+    entry = _rule_sets.get(key)
+    if entry is not None and entry["path"] is None:
+        return entry["plan"]
+
+    path = entry["path"] if entry is not None else _rule_set_path(*key)
+    mtime = os.stat(path).st_mtime_ns
+    if entry is None or entry["mtime"] != mtime:
+        with open(path) as f:
+            plan = compile_rules(json.load(f))
+        entry = {"plan": plan, "path": path, "mtime": mtime}
+        _rule_sets[key] = entry
+        logging.info(f"📚 Compiled rule set '{key[0]}' (version={plan.version}) from {path}")
+    return entry["plan"]
+
+
+# --- Reference tables for foreignKeyMatch ---
+
+# Reference key sets kept in memory, keyed by blob and generation
+REFERENCE_CACHE_SIZE = int(os.environ.get("VALIDATION_REFERENCE_CACHE_SIZE", 16))
+
+
+def _read_key_column(data: bytes, blob_name: str, column: str) -> pd.Series:
+    buffer = io.BytesIO(data)
+    if blob_name.endswith(".parquet"):
+        return pd.read_parquet(buffer, columns=[column])[column]
+    elif blob_name.endswith(".csv"):
+        return pd.read_csv(buffer, usecols=[column])[column]
+    raise ValueError(f"Unsupported reference table format: {blob_name}")
+
+
+def _key_index(values: Any) -> pd.Index:
+    keys = pd.Index(pd.unique(values))
+    keys.is_unique  # builds the hash table once, up front
+    return keys
+
+
+@lru_cache(maxsize=REFERENCE_CACHE_SIZE)
+def _load_reference_keys(bucket_name: str, blob_name: str, generation: int, column: str) -> pd.Index:
+    blob = storage.Client().bucket(bucket_name).blob(blob_name, generation=generation)
+    return _key_index(_read_key_column(blob.download_as_bytes(), blob_name, column))
+
+
+def load_reference_keys(uri: str, column: str) -> pd.Index:
+    """Key set of a gs:// reference table, downloaded and hashed once per
+    blob generation and reused across requests until the blob changes."""
+    bucket_name, blob_name = uri.replace("gs://", "").split("/", 1)
+    blob = storage.Client().bucket(bucket_name).get_blob(blob_name)
+    if blob is None:
+        raise FileNotFoundError(f"Reference table not found: {uri}")
+    return _load_reference_keys(bucket_name, blob_name, blob.generation, column)
+
+
+def resolve_references(plan: "ValidationPlan", ref_data: Dict[str, Any]) -> Dict[int, Any]:
+    """Resolve each foreignKeyMatch to a hashed key index (None when its
+    table is unknown). ref_data maps table names to DataFrames or gs:// URIs;
+    a gs:// ref_table is loaded directly. Load errors surface per check."""
+    refs: Dict[int, Any] = {}
+    for c in plan.constraints:
+        if c["type"] != "foreignKeyMatch":
+            continue
+        try:
+            table = c["spec"]["ref_table"]
+            source = ref_data.get(table, table if str(table).startswith("gs://") else None)
+            if isinstance(source, str):
+                refs[c["index"]] = load_reference_keys(source, c["spec"]["ref_column"])
+            elif source is not None:
+                refs[c["index"]] = _key_index(source[c["spec"]["ref_column"]])
         except Exception as e:
-            result["status"] = "ERROR"
-            result["description"] = f"Error: {str(e)}"
+            refs[c["index"]] = e
+    return refs
+
+
+def _reference_keys(c: Dict[str, Any], refs: Dict[int, Any]) -> Optional[pd.Index]:
+    keys = refs.get(c["index"])
+    if isinstance(keys, Exception):
+        raise keys
+    return keys
+
+
+class ColumnAggregates:
+    """Lazily computed, cached per-column aggregates over one DataFrame.
+    `columns` is the file's full header when only a projection was read."""
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[List[str]] = None):
+        self.df = df
+        self.columns = list(df.columns) if columns is None else list(columns)
+        self.values: Dict[Tuple[str, str], Any] = {}
+        self.flagged: Dict[int, Any] = {}
+        # Shared by every business rule evaluated over this frame
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.terms: Dict[str, Any] = {}
+        # Seconds spent per ("column", name) aggregate block and ("count", index)
+        self.timings: Dict[Tuple[str, Any], float] = {}
+        self.column_bytes: Dict[str, int] = {}
+
+    def array(self, column: str) -> np.ndarray:
+        if column not in self.arrays:
+            values = self.df[column]
+            if not (isinstance(values.dtype, np.dtype) and values.dtype.kind in "biuf"):
+                raise TypeError(f"Column '{column}' is not a plain numeric column")
+            self.arrays[column] = values.to_numpy()
+        return self.arrays[column]
+
+    def memo(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        if key not in self.terms:
+            self.terms[key] = fn(self)
+        return self.terms[key]
+
+    def dtype(self, column: str) -> Any:
+        return self.df[column].dtype
+
+    def series(self, column: str) -> pd.Series:
+        return self.df[column]
+
+    def get(self, column: str, name: str) -> Any:
+        key = (column, name)
+        if key not in self.values:
+            start = time.perf_counter()
+            try:
+                self.values[key] = AGGREGATES[name](self.df[column])
+            finally:
+                _spent(self.timings, ("column", column), start)
+        return self.values[key]
+
+    def _flagged(self, c: Dict[str, Any], refs: Dict[int, Any]) -> Any:
+        if c["index"] not in self.flagged:
+            start = time.perf_counter()
+            try:
+                self.flagged[c["index"]] = COUNTERS[c["type"]](c, self.df, self, self, refs)
+            finally:
+                _spent(self.timings, ("count", c["index"]), start)
+        return self.flagged[c["index"]]
+
+    def scan_cost(self, c: Dict[str, Any]) -> Tuple[int, int]:
+        """Rows and in-memory bytes of the columns a constraint reads (object
+        columns count their references, not the referenced strings)."""
+        if c["type"] in SCHEMA_CHECKS or c["type"] not in CHECKS:
+            return 0, 0
+        columns = _sample_columns(c, self.df)
+        for column in columns:
+            if column not in self.column_bytes:
+                self.column_bytes[column] = int(self.df[column].memory_usage(index=False, deep=False))
+        return len(self.df), sum(self.column_bytes[column] for column in columns)
+
+    def violations(self, c: Dict[str, Any], refs: Dict[int, Any]) -> int:
+        return _tally(self._flagged(c, refs))
+
+    def violation_samples(self, c: Dict[str, Any], refs: Dict[int, Any]) -> Optional[List[Dict[str, Any]]]:
+        ctype, column = c["type"], c["column"]
+        if ctype in COUNTERS:
+            mask = self._flagged(c, refs)
+        elif ctype in NULL_CHECKS:
+            mask = self.df[column].isnull().to_numpy()
+        elif ctype == "isUnique":
+            mask = self.df[column].duplicated().to_numpy()
+        else:
+            return None
+        if not isinstance(mask, np.ndarray):
+            return None
+        sample = ViolationSample(c["sample_size"], seed=c["index"])
+        sample.add(self.df, mask, _sample_columns(c, self.df), labels=self.df.index)
+        return sample.rows()
+
+
+# --- Row counters: the offending rows of one frame, as a boolean mask, or
+# None when a bound proves there are none (an int when only a count is
+# available). `aggs` covers that frame, `stats` the whole dataset (the same
+# object outside streaming mode). ---
+
+def _spent(timings: Dict[Tuple[str, Any], float], key: Tuple[str, Any], start: float) -> None:
+    timings[key] = timings.get(key, 0.0) + time.perf_counter() - start
+
+
+def _tally(flagged: Any) -> int:
+    if flagged is None:
+        return 0
+    if isinstance(flagged, np.ndarray):
+        return int(flagged.sum())
+    return flagged
+
+
+def _count_foreign_key(c, df, aggs, stats, refs):
+    keys = _reference_keys(c, refs)
+    return keys.get_indexer(df[c["column"]]) < 0
+
+
+def _count_pattern(c, df, aggs, stats, refs):
+    if "pattern_error" in c:
+        raise c["pattern_error"]
+    values = df[c["column"]]
+    present = values.notna().to_numpy()
+    mask = np.zeros(len(values), dtype=bool)
+    mask[present] = _mismatch_mask(values[present].astype(str), c["pattern"], c["arrow_pattern"],
+                                   c["arrow_ascii_only"])
+    return mask
+
+
+def _count_range(c, df, aggs, stats, refs):
+    column = c["column"]
+    min_v, max_v = c["spec"]["min"], c["spec"]["max"]
+    # Column bounds inside the range means nothing to count
+    numeric = pd.api.types.is_numeric_dtype(df[column])
+    if numeric and aggs.get(column, "min") >= min_v and aggs.get(column, "max") <= max_v:
+        return None
+    return ((df[column] < min_v) | (df[column] > max_v)).to_numpy(dtype=bool, na_value=False)
+
+
+def _zscore_bounded(c, aggs, stats) -> bool:
+    # The extremes bound every z-score; only scan when one of them is over
+    column = c["column"]
+    mean, std = stats.get(column, "mean"), stats.get(column, "std")
+    spread = max(aggs.get(column, "max") - mean, mean - aggs.get(column, "min"))
+    return spread / std <= c["spec"].get("threshold", 3)
+
+
+def _count_zscore(c, df, aggs, stats, refs):
+    if _zscore_bounded(c, aggs, stats):
+        return None
+    column = c["column"]
+    mean, std = stats.get(column, "mean"), stats.get(column, "std")
+    zscores = ((df[column] - mean) / std).abs()
+    return (zscores > c["spec"].get("threshold", 3)).to_numpy(dtype=bool, na_value=False)
+
+
+def _count_expression(c, df, aggs, stats, refs):
+    program = c.get("program")
+    if program is not None:
+        try:
+            passed = program(aggs)
+            if isinstance(passed, np.ndarray) and passed.dtype == bool and passed.shape == (len(df),):
+                return ~passed
+        except Exception:
+            pass
+    # Expressions the engine does not cover go through pandas
+    failed = df.eval(f"not ({c['spec']['expression']})")
+    if isinstance(failed, pd.Series) and failed.dtype == bool:
+        return failed.to_numpy()
+    # Anything but a boolean column keeps df.query's own semantics
+    return df.query(f"not ({c['spec']['expression']})").shape[0]
+
+
+COUNTERS: Dict[str, Callable[..., Any]] = {
+    "foreignKeyMatch": _count_foreign_key,
+    "matchesPattern": _count_pattern,
+    "isWithinRange": _count_range,
+    "outlierZScore": _count_zscore,
+    "expressionCheck": _count_expression,
+}
+
+
+class ViolationSample:
+    """Up to `size` offending rows, kept by random priority so the sample is
+    uniform over every violation seen while memory stays bounded."""
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.kept: List[Tuple[int, Dict[str, Any]]] = []
+
+    def add(self, frame: pd.DataFrame, mask: np.ndarray, columns: List[str], offset: int = 0,
+            labels: Optional[pd.Index] = None) -> None:
+        """Offer the rows of `frame` flagged in `mask`. Rows are reported by
+        index label when `labels` is given, else by `offset` + position."""
+        hits = np.flatnonzero(mask)
+        if self.size <= 0 or len(hits) == 0:
+            return
+        keys = self.rng.random(len(hits))
+        if len(hits) > self.size:
+            top = np.argpartition(keys, self.size)[:self.size]
+            hits, keys = hits[top], keys[top]
+        rows = frame.iloc[hits]
+        values = json.loads(rows[columns].to_json(orient="records", date_format="iso", double_precision=15))
+        ids = offset + hits if labels is None else json.loads(
+            pd.Series(labels[hits]).to_json(orient="values", date_format="iso"))
+        candidates = [(int(offset + h), {"row": row_id, "values": v}) for h, row_id, v in zip(hits, _plain(ids), values)]
+
+        keys = np.concatenate([self.keys, keys])
+        candidates = self.kept + candidates
+        keep = np.argsort(keys, kind="stable")[:self.size]
+        self.keys, self.kept = keys[keep], [candidates[i] for i in keep]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [row for _, row in sorted(self.kept, key=lambda item: item[0])]
+
+
+def _plain(ids: Any) -> List[Any]:
+    return [i.item() if isinstance(i, np.generic) else i for i in ids]
+
+
+def _sample_columns(c: Dict[str, Any], frame: pd.DataFrame) -> List[str]:
+    # The columns a constraint reads, or every column when unknown
+    if c["reads"] is None:
+        return list(frame.columns)
+    return [column for column in frame.columns if column in c["reads"]]
+
+
+def _violation_rows(c: Dict[str, Any], aggs: Any, refs: Dict[int, Any]) -> Optional[List[Dict[str, Any]]]:
+    # Samples are best effort and never change a constraint's status
+    if c["sample_size"] <= 0:
+        return None
+    try:
+        return aggs.violation_samples(c, refs)
+    except Exception:
+        return None
+
+
+# --- Checks: each returns (passed, description) ---
+
+# 1. Schema Validation
+def _check_column_count(c, aggs, refs):
+    expected = c["spec"]["value"]
+    actual = len(aggs.columns)
+    return actual == expected, f"Expected {expected} columns, got {actual}"
+
+
+def _check_column_names(c, aggs, refs):
+    expected = set(c["spec"]["columns"])
+    actual = set(aggs.columns)
+    return expected == actual, f"Expected columns {expected}, got {actual}"
+
+
+def _check_dtype(c, aggs, refs):
+    expected = c["spec"]["dtype"]
+    actual = str(aggs.dtype(c["column"]))
+    return expected == actual, f"Expected dtype '{expected}', got '{actual}'"
+
+
+def _check_nullable(c, aggs, refs):
+    nullable = c["spec"]["nullable"]
+    nulls = aggs.get(c["column"], "nulls")
+    return nullable or nulls == 0, f"{nulls} null values found"
+
+
+def _check_foreign_key(c, aggs, refs):
+    if _reference_keys(c, refs) is None:
+        return True, ""
+    count = aggs.violations(c, refs)
+    return count == 0, f"{count} values not found in reference table"
+
+
+# 2. Integrity Checks
+def _check_unique(c, aggs, refs):
+    dupes = aggs.get(c["column"], "duplicates")
+    return dupes == 0, f"{dupes} duplicate values"
+
+
+def _check_pattern(c, aggs, refs):
+    count = aggs.violations(c, refs)
+    return count == 0, f"{count} values failed pattern match"
+
+
+# 3. Quality Checks
+def _check_complete(c, aggs, refs):
+    missing = aggs.get(c["column"], "nulls")
+    return missing == 0, f"{missing} missing values"
+
+
+def _check_range(c, aggs, refs):
+    outliers = aggs.violations(c, refs)
+    min_v, max_v = c["spec"]["min"], c["spec"]["max"]
+    return outliers == 0, f"{outliers} values out of range [{min_v}, {max_v}]"
+
+
+def _check_zscore(c, aggs, refs):
+    count = aggs.violations(c, refs)
+    return count == 0, f"{count} outliers with z-score > {c['spec'].get('threshold', 3)}"
+
+
+# 4. Business Rules
+def _check_expression(c, aggs, refs):
+    expr = c["spec"]["expression"]
+    failed = aggs.violations(c, refs)
+    return failed == 0, f"{failed} rows failed business rule: {expr}"
 
+
+# 5. Statistical Checks
+def _check_stat(c, aggs, refs):
+    metric = c["spec"]["metric"]
+    expected = c["spec"]["value"]
+    if metric in STAT_METRICS:
+        actual = aggs.get(c["column"], metric)
+    else:
+        actual = getattr(aggs.series(c["column"]), metric)()
+    passed = np.isclose(actual, expected, atol=c["spec"].get("tolerance", 0.01))
+    return passed, f"{metric}: expected ~{expected}, got {actual}"
+
+
+def _check_drift(c, aggs, refs):
+    prev_val = c["spec"]["previous_value"]
+    drift = abs(aggs.get(c["column"], "mean") - prev_val)
+    threshold = c["spec"]["threshold"]
+    return not drift > threshold, f"Mean drifted by {drift} (threshold={threshold})"
+
+
+# 6. Timeliness
+def _check_fresh(c, aggs, refs):
+    max_age_days = c["spec"]["max_days"]
+    age_days = (pd.Timestamp.now() - aggs.get(c["column"], "latest")).days
+    return not age_days > max_age_days, f"Data is {age_days} days old (limit={max_age_days})"
+
+
+# 7. Completeness
+def _check_percent_complete(c, aggs, refs):
+    threshold = c["spec"]["threshold"]
+    rows = aggs.get(c["column"], "rows")
+    percent = (rows - aggs.get(c["column"], "nulls")) / rows * 100 if rows else np.nan
+    return not percent < threshold, f"{percent:.2f}% complete (threshold={threshold}%)"
+
+
+CHECKS: Dict[str, Callable[..., Tuple[bool, str]]] = {
+    "hasColumnCount": _check_column_count,
+    "hasColumnNames": _check_column_names,
+    "hasDtype": _check_dtype,
+    "isNullable": _check_nullable,
+    "foreignKeyMatch": _check_foreign_key,
+    "isUnique": _check_unique,
+    "matchesPattern": _check_pattern,
+    "isComplete": _check_complete,
+    "isWithinRange": _check_range,
+    "outlierZScore": _check_zscore,
+    "expressionCheck": _check_expression,
+    "statCheck": _check_stat,
+    "valueDriftCheck": _check_drift,
+    "isFresh": _check_fresh,
+    "percentComplete": _check_percent_complete,
+}
+
+
+def _evaluate_one(c: Dict[str, Any], aggs: Any, refs: Dict[int, Any]) -> Dict[str, Any]:
+    ctype = c["type"]
+    result = {
+        "type": ctype,
+        "column": c["column"],
+        "status": "PASS",
+        "description": "",
+    }
+
+    try:
+        check = CHECKS.get(ctype)
+        if check is None:
+            result["status"] = "UNKNOWN"
+            result["description"] = f"Unknown check type: {ctype}"
+        else:
+            passed, result["description"] = check(c, aggs, refs)
+            if not passed:
+                result["status"] = "FAIL"
+                rows = _violation_rows(c, aggs, refs)
+                if rows:
+                    result["violation_samples"] = rows
+
+    except Exception as e:
+        result["status"] = "ERROR"
+        result["description"] = f"Error: {str(e)}"
+
+    return result
+
+
+SKIPPED_STOPPED = "Skipped: validation stopped at a failing blocking rule"
+SKIPPED_EXCLUDED = "Skipped: not selected for evaluation"
+
+
+def _skipped(c: Dict[str, Any], description: str) -> Dict[str, Any]:
+    return {"type": c["type"], "column": c["column"], "status": "SKIPPED", "description": description}
+
+
+def _evaluate(
+    plan: ValidationPlan,
+    aggs: Any,
+    refs: Dict[int, Any],
+    fail_fast: bool = False,
+    only: Optional[Iterable[int]] = None,
+) -> List[Dict[str, Any]]:
+    """Evaluate constraints in order. Constraints outside `only` are SKIPPED
+    as excluded; with fail_fast, everything after the first failing blocking
+    rule is SKIPPED as stopped."""
+    only = None if only is None else set(only)
+    results = []
+    stopped = False
+    own: Dict[int, float] = {}
+
+    for c in plan.constraints:
+        if only is not None and c["index"] not in only:
+            results.append(_skipped(c, SKIPPED_EXCLUDED))
+            continue
+        if stopped:
+            results.append(_skipped(c, SKIPPED_STOPPED))
+            continue
+        # Own time, excluding shared aggregates and counts computed meanwhile
+        before = sum(aggs.timings.values())
+        start = time.perf_counter()
+        result = _evaluate_one(c, aggs, refs)
+        own[c["index"]] = time.perf_counter() - start - (sum(aggs.timings.values()) - before)
         results.append(result)
+        if fail_fast and c["blocking"] and result["status"] == "FAIL":
+            stopped = True
+
+    _attach_costs(plan, results, aggs, own)
+    return results
+
+
+# --- fail_fast: one result shape for every route ---
+
+def _header_rules(plan: ValidationPlan) -> List[int]:
+    # Schema rules, decided by the column header alone
+    return [c["index"] for c in plan.constraints if c["type"] in SCHEMA_CHECKS]
+
+
+def _first_blocking_failure(plan: ValidationPlan, results: List[Dict[str, Any]],
+                            among: Iterable[int]) -> Optional[int]:
+    among = set(among)
+    for c, result in zip(plan.constraints, results):
+        if c["index"] in among and c["blocking"] and result["status"] == "FAIL":
+            return c["index"]
+    return None
+
+
+def _fail_fast_results(
+    plan: ValidationPlan,
+    header: List[int],
+    header_results: List[Dict[str, Any]],
+    data_results: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """fail_fast results, the same shape on every route. Schema rules are
+    evaluated first and always reported. If one of them fails a blocking
+    check, no data rule is evaluated (data_results is None). Otherwise only
+    the first failing blocking data rule is reported, by rule order among
+    the failures known when evaluation stopped; with none, every data
+    result is. Everything else is SKIPPED."""
+    header = set(header)
+    stop = None
+    if data_results is not None:
+        stop = _first_blocking_failure(plan, data_results, [i for i in range(len(plan.constraints)) if i not in header])
+    results = []
+    for c in plan.constraints:
+        i = c["index"]
+        if i in header:
+            results.append(header_results[i])
+        elif data_results is not None and (stop is None or i == stop):
+            results.append(data_results[i])
+        else:
+            results.append(_skipped(c, SKIPPED_STOPPED))
+    return results
+
 
+def _aggregate_column(c: Dict[str, Any]) -> Optional[str]:
+    # The column whose shared aggregates a constraint reads, if any
+    if c["column"] is None:
+        return None
+    if _aggregates_for(c["type"], c["spec"]) or c["type"] == "statCheck":
+        return c["column"]
+    return None
+
+
+def _attach_costs(plan: ValidationPlan, results: List[Dict[str, Any]], aggs: Any, own: Dict[int, float]) -> None:
+    """Add wall time, rows scanned and bytes touched to every evaluated
+    result. Time spent on a column's shared aggregates is split evenly
+    between the constraints reading them."""
+    readers: Dict[str, int] = {}
+    for c in plan.constraints:
+        column = _aggregate_column(c)
+        if column is not None:
+            readers[column] = readers.get(column, 0) + 1
+
+    for c, result in zip(plan.constraints, results):
+        if c["index"] not in own:
+            continue
+        seconds = own[c["index"]] + aggs.timings.get(("count", c["index"]), 0.0)
+        column = _aggregate_column(c)
+        if column is not None:
+            seconds += aggs.timings.get(("column", column), 0.0) / readers[column]
+        try:
+            rows, nbytes = aggs.scan_cost(c)
+        except Exception:
+            rows, nbytes = 0, 0
+        result["cost"] = {"wall_time_s": round(max(seconds, 0.0), 6), "rows_scanned": int(rows), "bytes_touched": int(nbytes)}
+
+
+def cost_summary(results: List[Dict[str, Any]], top: int = 5) -> Dict[str, Any]:
+    """Totals and the `top` most expensive constraints of a validation run."""
+    costed = [(i, r) for i, r in enumerate(results) if "cost" in r]
+    ranked = sorted(costed, key=lambda item: item[1]["cost"]["wall_time_s"], reverse=True)[:top]
+    return {
+        "constraints": len(results),
+        "wall_time_s": round(sum(r["cost"]["wall_time_s"] for _, r in costed), 6),
+        "rows_scanned": sum(r["cost"]["rows_scanned"] for _, r in costed),
+        "bytes_touched": sum(r["cost"]["bytes_touched"] for _, r in costed),
+        "costliest": [
+            {"index": i, "type": r["type"], "column": r["column"], "status": r["status"], **r["cost"]}
+            for i, r in ranked
+        ],
+    }
+
+
+# --- Sampled validation ---
+
+# Rows kept by the reservoir in sampled mode
+SAMPLE_ROWS = int(os.environ.get("VALIDATION_SAMPLE_ROWS", 10_000))
+VALIDATION_MODES = ("full", "fail_fast", "sampled")
+# Two-sided 95% normal quantile for the Wilson interval
+_Z95 = 1.959963984540054
+
+
+def reservoir_sample(batches: Iterable[pd.DataFrame], size: int, seed: int = 0) -> Tuple[pd.DataFrame, int]:
+    """Uniform sample of `size` rows from a stream of batches, holding at most
+    `size` rows at a time: every row draws a random priority and the lowest
+    priorities are kept. Returns the sample, indexed by row offset, and the
+    total number of rows seen."""
+    rng = np.random.default_rng(seed)
+    kept, kept_keys, rows = None, np.empty(0), 0
+    for batch in batches:
+        keys = rng.random(len(batch))
+        batch = batch.set_axis(pd.RangeIndex(rows, rows + len(batch)))
+        rows += len(batch)
+        if kept is not None:
+            batch, keys = pd.concat([kept, batch]), np.concatenate([kept_keys, keys])
+        if len(keys) > size:
+            top = np.argpartition(keys, size)[:size]
+            batch, keys = batch.iloc[top], keys[top]
+        kept, kept_keys = batch, keys
+    if kept is None:
+        return pd.DataFrame(), 0
+    return kept.sort_index(), rows
+
+
+def wilson_interval(violations: int, n: int, z: float = _Z95) -> Tuple[float, float]:
+    if n == 0:
+        return 0.0, 1.0
+    p = violations / n
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    low = 0.0 if violations == 0 else max(0.0, center - half)
+    high = 1.0 if violations == n else min(1.0, center + half)
+    return float(low), float(high)
+
+
+def _violation_count(c: Dict[str, Any], aggs: Any, refs: Dict[int, Any]) -> Optional[int]:
+    # Row-level violations of a constraint, where a rate makes sense
+    if c["type"] in ("isComplete", "percentComplete") or (c["type"] == "isNullable" and c["spec"].get("nullable") is False):
+        return aggs.get(c["column"], "nulls")
+    if c["type"] in COUNTERS and not (c["type"] == "foreignKeyMatch" and _reference_keys(c, refs) is None):
+        return aggs.violations(c, refs)
+    return None
+
+
+def _evaluate_sample(
+    plan: ValidationPlan,
+    aggs: Any,
+    refs: Dict[int, Any],
+    sample_rows: int,
+    total_rows: int,
+    exact: Iterable[int] = (),
+) -> List[Dict[str, Any]]:
+    """Evaluate on a sample, adding the estimated violation rate and its 95%
+    Wilson interval to every row-level constraint not answered `exact`ly."""
+    exact = set(exact)
+    results = _evaluate(plan, aggs, refs)
+    for c, result in zip(plan.constraints, results):
+        if c["index"] in exact or result["status"] not in ("PASS", "FAIL"):
+            continue
+        count = _violation_count(c, aggs, refs)
+        if count is None:
+            continue
+        rate = count / sample_rows if sample_rows else 0.0
+        low, high = wilson_interval(int(count), sample_rows)
+        result["sample"] = {
+            "rows": sample_rows,
+            "violations": int(count),
+            "estimated_rate": rate,
+            "rate_ci95": [low, high],
+            "estimated_violations": int(round(rate * total_rows)),
+            "total_rows": total_rows,
+        }
     return results
 
+
+def validate(
+    df: pd.DataFrame,
+    checks: Dict[str, Any],
+    ref_data: Dict[str, Any] = {},
+    columns: Optional[List[str]] = None,
+    statistics: Optional["ParquetStatistics"] = None,
+    mode: str = "full",
+    sample_size: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Validate a DataFrame. `mode` is "full", "fail_fast" (stop at the first
+    failing blocking rule) or "sampled" (evaluate a reservoir sample and
+    estimate violation rates)."""
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode: {mode}")
+    plan = compile_rules(checks)
+    refs = resolve_references(plan, ref_data)
+    total_rows = len(df)
+    if mode == "sampled":
+        df, total_rows = reservoir_sample([df], SAMPLE_ROWS if sample_size is None else sample_size)
+    aggs = ColumnAggregates(df, columns)
+    if statistics is not None:
+        aggs = StatisticsAggregates(statistics, aggs)
+    if mode == "sampled":
+        exact = statistics.answered(plan) if statistics is not None else ()
+        return _evaluate_sample(plan, aggs, refs, len(df), total_rows, exact)
+    if mode == "fail_fast":
+        header = _header_rules(plan)
+        header_results = _evaluate(plan, aggs, refs, only=header)
+        if _first_blocking_failure(plan, header_results, header) is not None:
+            return _fail_fast_results(plan, header, header_results)
+        data = [c["index"] for c in plan.constraints if c["index"] not in set(header)]
+        return _fail_fast_results(plan, header, header_results, _evaluate(plan, aggs, refs, fail_fast=True, only=data))
+    return _evaluate(plan, aggs, refs)
+
+
+# --- Streaming validation ---
+
+# Rows per record batch when streaming a file
+STREAM_BATCH_ROWS = 250_000
+# Distinct hashes buffered per column before they are deduplicated
+UNIQUE_COMPACT_ROWS = 5_000_000
+
+
+def _combine_dtypes(a: Any, b: Any) -> Any:
+    if a == b:
+        return a
+    if isinstance(a, np.dtype) and isinstance(b, np.dtype) and a.kind in "biuf" and b.kind in "biuf":
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+def _nanmin(a: Any, b: Any) -> Any:
+    return b if pd.isna(a) else a if pd.isna(b) else min(a, b)
+
+
+def _nanmax(a: Any, b: Any) -> Any:
+    return b if pd.isna(a) else a if pd.isna(b) else max(a, b)
+
+
+class StreamingAggregates:
+    """Mergeable aggregates fed one record batch at a time. Exposes the same
+    interface as ColumnAggregates, so every check runs unchanged on it."""
+
+    def __init__(self, plan: ValidationPlan, refs: Dict[int, Any], columns: Optional[List[str]] = None):
+        self.plan = plan
+        self.refs = refs
+        self.columns: Optional[List[str]] = None if columns is None else list(columns)
+        self.dtypes: Dict[str, Any] = {}
+        self.partials: Dict[Tuple[str, str], Any] = {}
+        self.kept: Dict[str, List[pd.Series]] = {}
+        self.counts: Dict[int, Any] = {}
+        self.errors: Dict[Any, Exception] = {}
+        # Violation samples by constraint, and the offset of the current batch
+        self.samples: Dict[int, ViolationSample] = {}
+        self.offset = 0
+        # Cost accounting: seconds per ("column", name) / ("count", index),
+        # rows and bytes read per pass
+        self.timings: Dict[Tuple[str, Any], float] = {}
+        self.rows_read = [0, 0]
+        self.column_bytes: List[Dict[str, int]] = [{}, {}]
+
+    def _guard(self, key: Any, func: Callable[[], None]) -> None:
+        if key in self.errors:
+            return
+        try:
+            func()
+        except Exception as e:
+            self.errors[key] = e
+
+    def update(self, batch: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = list(batch.columns)
+        for column, dtype in batch.dtypes.items():
+            self.dtypes[column] = _combine_dtypes(self.dtypes.get(column, dtype), dtype)
+
+        self._read(batch, 0)
+        for column, needed in self.plan.aggregates.items():
+            start = time.perf_counter()
+            for name in needed:
+                key = (column, "moments" if name in ("mean", "std") else name)
+                self._guard(key, lambda: self._merge(key, batch[column]))
+            _spent(self.timings, ("column", column), start)
+        for column in self.plan.holistic:
+            self._guard((column, "series"), lambda: self.kept.setdefault(column, []).append(batch[column]))
+
+        batch_aggs = ColumnAggregates(batch)
+        for c in self.plan.constraints:
+            if c["type"] in COUNTERS and c["type"] != "outlierZScore":
+                self._count(c, batch, batch_aggs)
+            elif c["type"] in NULL_CHECKS and c["sample_size"] > 0 and c["spec"].get("nullable") is not True:
+                self._guard(("sample", c["index"]), lambda: self._sample(c, batch, batch[c["column"]].isnull().to_numpy()))
+        self.offset += len(batch)
+
+    def _sample(self, c: Dict[str, Any], batch: pd.DataFrame, mask: np.ndarray) -> None:
+        if c["sample_size"] <= 0 or not mask.any():
+            return
+        sample = self.samples.setdefault(c["index"], ViolationSample(c["sample_size"], seed=c["index"]))
+        sample.add(batch, mask, _sample_columns(c, batch), offset=self.offset)
+
+    def _merge(self, key: Tuple[str, str], s: pd.Series) -> None:
+        _, name = key
+        old = self.partials.get(key)
+        if name in ("rows", "nulls"):
+            self.partials[key] = (old or 0) + AGGREGATES[name](s)
+        elif name == "moments":
+            # Chan et al. parallel form of Welford's update
+            n, mean = s.count(), s.mean()
+            m2 = s.var(ddof=0) * n if n else 0.0
+            if old is not None and old[0]:
+                n0, mean0, m20 = old
+                total = n0 + n
+                delta = mean - mean0 if n else 0.0
+                mean = mean0 + delta * n / total
+                m2 = m20 + m2 + delta ** 2 * n0 * n / total
+                n = total
+            self.partials[key] = (n, mean, m2)
+        elif name in ("min", "max", "latest"):
+            value = AGGREGATES[name](s)
+            merge = _nanmin if name == "min" else _nanmax
+            self.partials[key] = value if old is None else merge(old, value)
+        elif name == "duplicates":
+            rows, hashes = old or (0, [])
+            hashes.append(np.unique(pd.util.hash_pandas_object(s, index=False).to_numpy()))
+            if sum(len(h) for h in hashes) > UNIQUE_COMPACT_ROWS:
+                hashes[:] = [np.unique(np.concatenate(hashes))]
+            self.partials[key] = (rows + len(s), hashes)
+
+    def _count(self, c: Dict[str, Any], batch: pd.DataFrame, batch_aggs: ColumnAggregates) -> None:
+        if c["type"] == "foreignKeyMatch" and self.refs.get(c["index"]) is None:
+            return
+        index = c["index"]
+
+        flagged = []
+        start = time.perf_counter()
+
+        def add():
+            flagged.append(COUNTERS[c["type"]](c, batch, batch_aggs, self, self.refs))
+            self.counts[index] = self.counts.get(index, 0) + _tally(flagged[0])
+
+        self._guard(("count", index), add)
+        if flagged and isinstance(flagged[0], np.ndarray):
+            self._guard(("sample", index), lambda: self._sample(c, batch, flagged[0]))
+        _spent(self.timings, ("count", index), start)
+
+    def _read(self, batch: pd.DataFrame, pass_index: int) -> None:
+        self.rows_read[pass_index] += len(batch)
+        read = self.column_bytes[pass_index]
+        for column in batch.columns:
+            read[column] = read.get(column, 0) + int(batch[column].memory_usage(index=False, deep=False))
+
+    def scan_cost(self, c: Dict[str, Any]) -> Tuple[int, int]:
+        if c["type"] in SCHEMA_CHECKS or c["type"] not in CHECKS:
+            return 0, 0
+        passes = (0, 1) if c["type"] == "outlierZScore" else (0,)
+        rows = sum(self.rows_read[p] for p in passes)
+        nbytes = 0
+        for p in passes:
+            read = self.column_bytes[p]
+            nbytes += sum(n for column, n in read.items() if c["reads"] is None or column in c["reads"])
+        return rows, nbytes
+
+    def needs_second_pass(self) -> bool:
+        # outlierZScore needs the dataset mean/std before it can count rows
+        for c in self.plan.constraints:
+            if c["type"] == "outlierZScore":
+                try:
+                    if not _zscore_bounded(c, self, self):
+                        return True
+                except Exception:
+                    pass
+        return False
+
+    def blocking_failures(self) -> List[int]:
+        """Blocking constraints already failing on the rows seen so far. Only
+        checks that further rows cannot turn back into a pass are considered."""
+        failed = []
+        for c in self.plan.constraints:
+            if not c["blocking"]:
+                continue
+            ctype, column = c["type"], c["column"]
+            try:
+                if ctype in SCHEMA_CHECKS:
+                    failing = not CHECKS[ctype](c, self, self.refs)[0]
+                elif ctype == "isComplete" or (ctype == "isNullable" and c["spec"].get("nullable") is False):
+                    failing = self.partials.get((column, "nulls"), 0) > 0
+                elif ctype == "isUnique":
+                    # Repeats within a batch, or found when hashes were compacted
+                    rows, hashes = self.partials.get((column, "duplicates"), (0, []))
+                    failing = rows > sum(len(h) for h in hashes)
+                elif ctype in COUNTERS and ctype != "outlierZScore":
+                    failing = self.counts.get(c["index"], 0) > 0
+                else:
+                    continue
+            except Exception:
+                continue
+            if failing:
+                failed.append(c["index"])
+        return failed
+
+    def update_second_pass(self, batch: pd.DataFrame) -> None:
+        self._read(batch, 1)
+        batch_aggs = ColumnAggregates(batch)
+        for c in self.plan.constraints:
+            if c["type"] == "outlierZScore":
+                self._count(c, batch, batch_aggs)
+        self.offset += len(batch)
+
+    def dtype(self, column: str) -> Any:
+        if column not in self.dtypes:
+            raise KeyError(column)
+        return self.dtypes[column]
+
+    def series(self, column: str) -> pd.Series:
+        self._raise_for((column, "series"))
+        if column not in self.kept:
+            raise KeyError(column)
+        return pd.concat(self.kept[column], ignore_index=True)
+
+    def get(self, column: str, name: str) -> Any:
+        key = (column, "moments" if name in ("mean", "std") else name)
+        self._raise_for(key)
+        if key not in self.partials:
+            raise KeyError(column)
+        value = self.partials[key]
+        if name == "mean":
+            return value[1] if value[0] else np.nan
+        if name == "std":
+            return np.sqrt(value[2] / (value[0] - 1)) if value[0] > 1 else np.nan
+        if name == "duplicates":
+            rows, hashes = value
+            return rows - len(np.unique(np.concatenate(hashes))) if hashes else 0
+        return value
+
+    def violation_samples(self, c: Dict[str, Any], refs: Dict[int, Any]) -> Optional[List[Dict[str, Any]]]:
+        # isUnique is not sampled: spotting a repeat needs every earlier hash
+        sample = self.samples.get(c["index"])
+        return None if sample is None else sample.rows()
+
+    def violations(self, c: Dict[str, Any], refs: Dict[int, Any]) -> int:
+        self._raise_for(("count", c["index"]))
+        if c["type"] == "outlierZScore" and _zscore_bounded(c, self, self):
+            return 0
+        return self.counts.get(c["index"], 0)
+
+    def _raise_for(self, key: Any) -> None:
+        if key in self.errors:
+            raise self.errors[key]
+
+
+def validate_stream(
+    open_batches: Callable[[], Iterable[pd.DataFrame]],
+    checks: Dict[str, Any],
+    ref_data: Dict[str, Any] = {},
+    columns: Optional[List[str]] = None,
+    statistics: Optional["ParquetStatistics"] = None,
+    fail_fast: bool = False,
+) -> List[Dict[str, Any]]:
+    """Validate record batches without holding the file in memory.
+
+    `open_batches` returns a fresh iterator over the batches; it is called a
+    second time only when an outlierZScore check needs the dataset mean/std.
+    `columns` is the file's full header when the batches are a projection.
+    With fail_fast, schema rules are checked before any batch is read
+    (after the first when `columns` is not given), and the reported rule is
+    the first failing blocking rule in rule order, as in-memory. Reading
+    stops once that rule is known to fail and every blocking rule before it
+    is settled by Parquet statistics; its counts are those up to that point.
+    """
+    plan = compile_rules(checks)
+    refs = resolve_references(plan, ref_data)
+    aggs = StreamingAggregates(plan, refs, columns)
+    final = aggs if statistics is None else StatisticsAggregates(statistics, aggs)
+    header = _header_rules(plan) if fail_fast else []
+    answered = statistics.answered(plan) if fail_fast and statistics is not None else []
+    gates = [c["index"] for c in plan.constraints if c["blocking"] and c["index"] not in header]
+    header_results: Optional[List[Dict[str, Any]]] = None
+    footer_failures: List[int] = []
+
+    def preflight() -> Optional[List[Dict[str, Any]]]:
+        # Schema rules, then rules the footer answers, once the header is known
+        nonlocal header_results
+        if not fail_fast or header_results is not None or aggs.columns is None:
+            return None
+        header_results = _evaluate(plan, final, refs, only=header)
+        if _first_blocking_failure(plan, header_results, header) is not None:
+            return _fail_fast_results(plan, header, header_results)
+        footer = _evaluate(plan, final, refs, only=answered)
+        footer_failures.extend(i for i in answered if plan.constraints[i]["blocking"] and footer[i]["status"] == "FAIL")
+        return None
+
+    def settled() -> Optional[List[Dict[str, Any]]]:
+        stopped = preflight()
+        if stopped is not None or header_results is None:
+            return stopped
+        failed = footer_failures + [i for i in aggs.blocking_failures() if i not in header]
+        if not failed:
+            return None
+        first = min(failed)
+        if any(i < first and i not in answered for i in gates):
+            return None
+        results = _evaluate(plan, final, refs, only=[first])
+        if first not in answered:
+            results[first]["description"] += " (counted until the scan stopped)"
+        return _fail_fast_results(plan, header, header_results, results)
+
+    stopped = settled()
+    if stopped is not None:
+        return stopped
+    for batch in open_batches():
+        aggs.update(batch)
+        stopped = settled()
+        if stopped is not None:
+            return stopped
+    stopped = preflight()
+    if stopped is not None:
+        return stopped
+    if aggs.needs_second_pass():
+        aggs.offset = 0
+        for batch in open_batches():
+            aggs.update_second_pass(batch)
+    results = _evaluate(plan, final, refs)
+    if not fail_fast:
+        return results
+    return _fail_fast_results(plan, header, header_results or results, results)
+
+
+def iter_batches(
+    path: str,
+    batch_size: int = STREAM_BATCH_ROWS,
+    columns: Optional[List[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    if path.endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=batch_size, usecols=columns)
+    elif path.endswith(".parquet"):
+        pf = pq.ParquetFile(path)
+        if pf.metadata.num_rows == 0:
+            yield _empty_parquet_frame(pf, columns)
+        for batch in pf.iter_batches(batch_size=batch_size, columns=_parquet_columns(pf, columns)):
+            yield batch.to_pandas()
+    else:
+        raise ValueError("Streaming validation supports CSV and Parquet files")
+
+
+# --- Projected reads ---
+
+def read_header(path: str) -> Optional[List[str]]:
+    """Column names from the CSV header or Parquet footer, without reading
+    rows. None for formats that have to be parsed whole."""
+    if path.endswith(".csv"):
+        return list(pd.read_csv(path, nrows=0).columns)
+    elif path.endswith(".parquet"):
+        return list(_empty_parquet_frame(pq.ParquetFile(path)).columns)
+    return None
+
+
+def load_frame(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a file, decoding only `columns` when given."""
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns)
+    elif path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    elif path.endswith(".xlsx"):
+        return pd.read_excel(path, usecols=columns)
+    elif path.endswith(".json"):
+        df = pd.read_json(path)
+        return df if columns is None else df[columns]
+    raise ValueError(f"Unsupported file format: {path}")
+
+
+def _parquet_columns(pf: "pq.ParquetFile", columns: Optional[List[str]]) -> Optional[List[str]]:
+    # Index columns stored alongside the data keep the frame's index intact
+    if columns is None:
+        return None
+    index = [name for name in (pf.schema_arrow.pandas_metadata or {}).get("index_columns", []) if isinstance(name, str)]
+    return list(columns) + [name for name in index if name not in columns]
+
+
+def _empty_parquet_frame(pf: "pq.ParquetFile", columns: Optional[List[str]] = None) -> pd.DataFrame:
+    df = pf.schema_arrow.empty_table().to_pandas()
+    return df if columns is None else df[columns]
+
+
+# --- Parquet footer statistics ---
+
+class ParquetStatistics:
+    """Row-group min/max/null_count statistics of a Parquet file, used to
+    answer null, range and freshness checks without decoding data. Only row
+    groups whose statistics are inconclusive are ever read."""
+
+    def __init__(self, path: str, header: Optional[List[str]] = None):
+        self.file = pq.ParquetFile(path)
+        metadata = self.file.metadata
+        visible = set(header if header is not None else read_header(path))
+        schema = self.file.schema_arrow
+        self.types = {name: schema.field(name).type for name in schema.names if name in visible}
+        self.row_counts = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        self.row_offsets = np.cumsum([0] + self.row_counts[:-1]).tolist()
+        self.num_rows = metadata.num_rows
+
+        # column -> one statistics object (or None) per row group
+        self.stats: Dict[str, List[Any]] = {name: [] for name in self.types}
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                chunk = row_group.column(j)
+                if chunk.path_in_schema in self.stats:
+                    self.stats[chunk.path_in_schema].append(chunk.statistics)
+        self._cache: Dict[Any, Any] = {}
+        # Rows and bytes decoded for a constraint, by constraint index
+        self.decoded: Dict[int, Tuple[int, int]] = {}
+
+    def _null_counts(self, column: str) -> Optional[List[int]]:
+        stats = self.stats.get(column)
+        if stats is None or len(stats) != len(self.row_counts):
+            return None
+        if any(st is None or not st.has_null_count for st in stats):
+            return None
+        return [st.null_count for st in stats]
+
+    def nulls(self, column: str) -> Optional[int]:
+        # Float NaN is null to pandas but not counted in Parquet null_count
+        if column not in self.types or pa.types.is_floating(self.types[column]):
+            return None
+        counts = self._null_counts(column)
+        return None if counts is None else sum(counts)
+
+    def latest(self, column: str) -> Optional[Any]:
+        key = ("latest", column)
+        if key not in self._cache:
+            self._cache[key] = self._latest(column)
+        return self._cache[key]
+
+    def _latest(self, column: str) -> Optional[Any]:
+        kind = self.types.get(column)
+        if kind is None or not (pa.types.is_timestamp(kind) or pa.types.is_date(kind)):
+            return None
+        counts = self._null_counts(column)
+        if counts is None:
+            return None
+        latest = None
+        for st, nulls, rows in zip(self.stats[column], counts, self.row_counts):
+            if nulls == rows:
+                continue
+            if not st.has_min_max:
+                return None
+            latest = pd.Timestamp(st.max) if latest is None else max(latest, pd.Timestamp(st.max))
+        return latest
+
+    def range_violations(self, c: Dict[str, Any]) -> Tuple[int, Tuple[int, int]]:
+        """Values outside the constraint's [min, max], with the rows and bytes
+        decoded to count them. Row groups entirely inside the range count
+        zero, integer row groups entirely outside it count their non-null
+        values; only the rest are decoded."""
+        key = ("range", c["index"])
+        if key not in self._cache:
+            self._cache[key] = self._range_violations(c)
+            self._add_decoded(c, self._cache[key][1])
+        total, decoded, _, _ = self._cache[key]
+        return total, decoded
+
+    def _add_decoded(self, c: Dict[str, Any], decoded: Tuple[int, int]) -> None:
+        rows, nbytes = self.decoded.get(c["index"], (0, 0))
+        self.decoded[c["index"]] = (rows + decoded[0], nbytes + decoded[1])
+
+    def _range_violations(self, c: Dict[str, Any]) -> Tuple[int, Tuple[int, int], ViolationSample, List[int]]:
+        # Also returns a sample of the decoded violations, and the row groups
+        # counted from statistics alone
+        column, min_v, max_v = c["column"], c["spec"]["min"], c["spec"]["max"]
+        kind = self.types[column]
+        counts = self._null_counts(column) or [None] * len(self.row_counts)
+        sample = ViolationSample(c["sample_size"], seed=c["index"])
+        total, rows_decoded, bytes_decoded, outside = 0, 0, 0, []
+        for i, (st, nulls, rows) in enumerate(zip(self.stats[column], counts, self.row_counts)):
+            if st is not None and st.has_min_max:
+                if st.min >= min_v and st.max <= max_v:
+                    continue
+                # Floats may hide NaN, which is neither null nor a violation
+                if pa.types.is_integer(kind) and nulls is not None and (st.max < min_v or st.min > max_v):
+                    total += rows - nulls
+                    outside.append(i)
+                    continue
+            elif nulls is not None and nulls == rows:
+                continue
+            chunk = self.file.read_row_group(i, columns=[column]).column(0)
+            values = chunk.to_pandas()
+            mask = ((values < min_v) | (values > max_v)).to_numpy()
+            total += int(mask.sum())
+            sample.add(values.to_frame(column), mask, [column], offset=self.row_offsets[i])
+            rows_decoded, bytes_decoded = rows_decoded + len(chunk), bytes_decoded + chunk.nbytes
+        return total, (rows_decoded, bytes_decoded), sample, outside
+
+    def violation_samples(self, c: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Example rows for a null or range check answered here. Row groups
+        the statistics settled are decoded only until the sample is full; that
+        decoding counts towards the constraint's scan cost."""
+        key = ("samples", c["index"])
+        if key not in self._cache:
+            rows, decoded = self._violation_samples(c)
+            self._cache[key] = rows
+            self._add_decoded(c, decoded)
+        return self._cache[key]
+
+    def _violation_samples(self, c: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], Tuple[int, int]]:
+        column = c["column"]
+        if c["type"] == "isWithinRange":
+            self.range_violations(c)
+            _, _, sample, outside = self._cache[("range", c["index"])]
+            # Row groups entirely outside the range: every non-null value
+            # violates, so their first rows are enough
+            decoded = self._sample_row_groups(column, outside, lambda values: values.notna(), sample, sample.size)
+        elif c["type"] in NULL_CHECKS:
+            counts = self._null_counts(column) or []
+            with_nulls = [i for i, nulls in enumerate(counts) if nulls]
+            sample = ViolationSample(c["sample_size"], seed=c["index"])
+            decoded = self._sample_row_groups(column, with_nulls, lambda values: values.isna(), sample,
+                                              STREAM_BATCH_ROWS)
+        else:
+            return None, (0, 0)
+        return sample.rows(), decoded
+
+    def _sample_row_groups(self, column: str, groups: List[int], flag: Callable[[pd.Series], pd.Series],
+                           sample: ViolationSample, batch_size: int) -> Tuple[int, int]:
+        rows_decoded, bytes_decoded = 0, 0
+        for i in groups:
+            offset = self.row_offsets[i]
+            for batch in self.file.iter_batches(batch_size=batch_size, row_groups=[i], columns=[column]):
+                if len(sample.kept) >= sample.size:
+                    return rows_decoded, bytes_decoded
+                values = batch.column(0).to_pandas()
+                sample.add(values.to_frame(column), flag(values).to_numpy(), [column], offset=offset)
+                offset += len(values)
+                rows_decoded, bytes_decoded = rows_decoded + len(values), bytes_decoded + batch.nbytes
+        return rows_decoded, bytes_decoded
+
+    def answers(self, c: Dict[str, Any]) -> bool:
+        """Whether constraint `c` is decided from the statistics alone."""
+        column, ctype = c["column"], c["type"]
+        if column not in self.types:
+            return False
+        if ctype in ("isNullable", "isComplete"):
+            return self.nulls(column) is not None
+        if ctype == "percentComplete":
+            return self.nulls(column) is not None
+        if ctype == "isFresh":
+            return self.latest(column) is not None
+        if ctype == "isWithinRange":
+            kind = self.types[column]
+            bounds = (c["spec"].get("min"), c["spec"].get("max"))
+            numeric = all(isinstance(b, (int, float)) and not isinstance(b, bool) for b in bounds)
+            return numeric and (pa.types.is_integer(kind) or pa.types.is_floating(kind))
+        return False
+
+    def answered(self, plan: ValidationPlan) -> List[int]:
+        return [c["index"] for c in plan.constraints if self.answers(c)]
+
+
+class StatisticsAggregates:
+    """Aggregates answered from Parquet statistics where they are exact,
+    deferring to `aggs` over the decoded columns for everything else."""
+
+    def __init__(self, statistics: ParquetStatistics, aggs: Any):
+        self.statistics = statistics
+        self.aggs = aggs
+        self.columns = aggs.columns
+        self.timings = aggs.timings
+
+    def scan_cost(self, c: Dict[str, Any]) -> Tuple[int, int]:
+        if self.statistics.answers(c):
+            return self.statistics.decoded.get(c["index"], (0, 0))
+        return self.aggs.scan_cost(c)
+
+    def dtype(self, column: str) -> Any:
+        return self.aggs.dtype(column)
+
+    def series(self, column: str) -> pd.Series:
+        return self.aggs.series(column)
+
+    def get(self, column: str, name: str) -> Any:
+        value = None
+        # Footer row counts pair only with footer null counts: for float
+        # columns nulls come from the decoded (possibly sampled) rows, and so
+        # must the denominator
+        if name == "rows" and self.statistics.nulls(column) is not None:
+            value = self.statistics.num_rows
+        elif name == "nulls":
+            value = self.statistics.nulls(column)
+        elif name == "latest":
+            value = self.statistics.latest(column)
+        return self.aggs.get(column, name) if value is None else value
+
+    def violations(self, c: Dict[str, Any], refs: Dict[int, Any]) -> int:
+        if c["type"] == "isWithinRange" and self.statistics.answers(c):
+            count, _ = self.statistics.range_violations(c)
+            return count
+        return self.aggs.violations(c, refs)
+
+    def violation_samples(self, c: Dict[str, Any], refs: Dict[int, Any]) -> Optional[List[Dict[str, Any]]]:
+        if self.statistics.answers(c):
+            return self.statistics.violation_samples(c)
+        return self.aggs.violation_samples(c, refs)
+
+
+def validate_path(
+    path: str,
+    checks: Dict[str, Any],
+    ref_data: Dict[str, Any] = {},
+    streaming: bool = False,
+    mode: str = "full",
+    sample_size: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Validate a local file, decoding only what the rule set needs: the
+    projected columns, minus those Parquet footer statistics already answer.
+
+    fail_fast checks the header and footer first and then scans CSV/Parquet
+    batch by batch, so a failing gate returns without reading the rest of
+    the file; results have the same shape as in-memory and streaming
+    fail_fast. sampled keeps a bounded reservoir of the streamed rows.
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode: {mode}")
+    plan = compile_rules(checks)
+    header = read_header(path)
+    statistics = ParquetStatistics(path, header) if path.endswith(".parquet") else None
+    answered = statistics.answered(plan) if statistics is not None else []
+    columns = plan.projection(header, answered) if header is not None else None
+    batched = path.endswith((".csv", ".parquet"))
+
+    if columns == []:
+        # Nothing left to decode: schema checks and statistics only
+        return validate(pd.DataFrame(), plan, ref_data, columns=header, statistics=statistics,
+                        mode="fail_fast" if mode == "fail_fast" else "full")
+    if mode == "sampled":
+        batches = iter_batches(path, columns=columns) if batched else [load_frame(path, columns)]
+        sample, total_rows = reservoir_sample(batches, SAMPLE_ROWS if sample_size is None else sample_size)
+        aggs = ColumnAggregates(sample, header)
+        if statistics is not None:
+            aggs = StatisticsAggregates(statistics, aggs)
+        return _evaluate_sample(plan, aggs, resolve_references(plan, ref_data), len(sample), total_rows, answered)
+    if streaming or (mode == "fail_fast" and batched):
+        return validate_stream(lambda: iter_batches(path, columns=columns), plan, ref_data,
+                               columns=header, statistics=statistics, fail_fast=mode == "fail_fast")
+    return validate(load_frame(path, columns), plan, ref_data, columns=header, statistics=statistics, mode=mode)